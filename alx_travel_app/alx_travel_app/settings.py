@@ -73,6 +73,11 @@ DATABASES = {
     }
 }
 
+# SQLite ignores select_for_update, so take the write lock when a transaction
+# starts instead; bookings are then serialized like with row locks elsewhere.
+if 'sqlite' in DATABASES['default']['ENGINE']:
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+
 # Force SSL certificate verification
 ssl_context = ssl.create_default_context(cafile=certifi.where())
 smtplib.SMTP_SSL.context = ssl_context
@@ -110,10 +115,10 @@ AUTH_USER_MODEL = 'listings.User'
 # Rest framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'listings.utils.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
+        'listings.utils.permissions.IsVerifiedUser',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     # 'EXCEPTION_HANDLER': 'listings.utils.exception_handler.custom_exception_handler'
@@ -138,16 +143,65 @@ CELERY_TASK_SOFT_TIME_LIMIT = int(env('CELERY_TASK_SOFT_TIME_LIMIT'))
 CELERY_TASK_ACKS_LATE = bool(env('CELERY_TASK_ACKS_LATE'))
 CELERY_TASK_REJECT_ON_WORKER_LOST = bool('CELERY_TASK_REJECT_ON_WORKER_LOST ')
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = bool('CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP')
+CELERY_BEAT_SCHEDULE = {
+    'compact-trending-properties': {
+        'task': 'listings.tasks.compact_trending',
+        'schedule': env.int('TRENDING_COMPACT_INTERVAL', default=3600),
+    },
+}
 
 # Caching settings
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
         "LOCATION": f"{env('REDIS_URL')}",
-        "TIMEOUT": None,   # cache forever by default
+        "TIMEOUT": env.int('CACHE_DEFAULT_TTL', default=3600),
     }
 }
 
+# Time to live (seconds) per cached key family, see `manage.py cache_stats`
+CACHE_TTLS = {
+    "user_profile": env.int('CACHE_TTL_USER_PROFILE', default=3600),
+    "host_profile": env.int('CACHE_TTL_HOST_PROFILE', default=3600),
+    "property": env.int('CACHE_TTL_PROPERTY', default=3600),
+    "list": env.int('CACHE_TTL_LIST', default=300),
+    "rate_limit": env.int('CACHE_TTL_RATE_LIMIT', default=300),
+    "calendar": env.int('CACHE_TTL_CALENDAR', default=86400),
+    "auth_token": env.int('CACHE_TTL_AUTH_TOKEN', default=3600),
+}
+
+# In-process LRU in front of Redis for user, host and property lookups
+LOCAL_CACHE_MAX_ENTRIES = env.int('LOCAL_CACHE_MAX_ENTRIES', default=1024)
+LOCAL_CACHE_TTL = env.int('LOCAL_CACHE_TTL', default=30)
+
+# Cache stampede protection: one worker rebuilds a key while the others serve the stale value
+CACHE_LOCK_TIMEOUT = env.int('CACHE_LOCK_TIMEOUT', default=10)
+CACHE_LOCK_WAIT = env.float('CACHE_LOCK_WAIT', default=2.0)
+CACHE_STALE_TTL = env.int('CACHE_STALE_TTL', default=600)
+CACHE_EARLY_REFRESH_BETA = env.float('CACHE_EARLY_REFRESH_BETA', default=1.0)  # 0 disables early refresh
+
+# Property listing pagination
+PROPERTY_PAGE_SIZE = env.int('PROPERTY_PAGE_SIZE', default=20)
+PROPERTY_MAX_PAGE_SIZE = env.int('PROPERTY_MAX_PAGE_SIZE', default=100)
+PROPERTY_CALENDAR_MAX_DAYS = env.int('PROPERTY_CALENDAR_MAX_DAYS', default=731)
+PROPERTY_QUOTE_MAX_IDS = env.int('PROPERTY_QUOTE_MAX_IDS', default=500)
+STAY_MAX_NIGHTS = env.int('STAY_MAX_NIGHTS', default=365)
+DASHBOARD_MAX_MONTHS = env.int('DASHBOARD_MAX_MONTHS', default=36)
+
+# JWT keys for the emailed verification links, rotated with the rotate_jwt_keys command
+JWT_ALGORITHM = env('ALGORITHM', default='RS256')
+JWT_PRIVATE_KEY_PATH = env('JWT_PRIVATE_KEY_PATH', default='private.pem')
+JWT_PUBLIC_KEY_PATH = env('JWT_PUBLIC_KEY_PATH', default='public.pem')  # published copy, not read by the app
+JWT_RETIRED_KEYS_DIR = env('JWT_RETIRED_KEYS_DIR', default='retired_keys')
+JWT_KEY_CHECK_INTERVAL = env.float('JWT_KEY_CHECK_INTERVAL', default=5.0)
+
+# Trending properties: bookings and reviews add to a score that halves every TRENDING_HALF_LIFE_HOURS
+TRENDING_HALF_LIFE_HOURS = env.float('TRENDING_HALF_LIFE_HOURS', default=72.0)
+TRENDING_BOOKING_WEIGHT = env.float('TRENDING_BOOKING_WEIGHT', default=3.0)
+TRENDING_REVIEW_WEIGHT = env.float('TRENDING_REVIEW_WEIGHT', default=1.0)
+TRENDING_MIN_SCORE = env.float('TRENDING_MIN_SCORE', default=0.01)
+TRENDING_MAX_SIZE = env.int('TRENDING_MAX_SIZE', default=10000)
+
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
     "TITLE": "Property App",
@@ -42,7 +42,9 @@ class UserSerializer(serializers.Serializer):
             if User.objects.exclude(user_id=instance.user_id).filter(email=email.lower()).exists():
                 raise serializers.ValidationError({"email": "Email in use."})
             instance.pending_email = email
-        instance.save()
+        # The instance is the cached request.user, a full save could roll back role, verified
+        # or is_active changes made since it was cached.
+        instance.save(update_fields=['phone_number', 'pending_email', 'updated_at'])
         return instance
         
 class LoginSerializer(serializers.Serializer):
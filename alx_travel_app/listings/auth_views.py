@@ -18,12 +18,15 @@ from rest_framework.decorators import authentication_classes, permission_classes
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 
-from .utils.helper_functions import check_if_is_admin, check_single_user_in_cache_db
+from .utils.helper_functions import check_single_user_in_cache_db
+from .utils.permissions import IsAdmin
+from .utils.cache_utils import load_index, fill_entity, set_entity
+from .utils.response_cache import cached_json_response
 from .serializers import PropertySerializer, BookingSerializer
 from .auth_serializer import UserSerializer, LoginSerializer, ResetPasswordSerializer, SetPasswordSerializer, ChangePasswordSerializer
 from .models import Property, Booking, User, Payment, Host
 from .tasks import email_verification
-from .utils.tokens import get_token, decode_token
+from .utils.tokens import get_token, decode_token, consume_token
 from dotenv import load_dotenv
 import os, requests, uuid
 
@@ -66,6 +69,8 @@ def Verify_signup_token(request):
     payload = decode_token(token)
     if not payload:
         return Response({"error": "Invalid or expired token"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
+    if not consume_token(payload):
+        return Response({"error": "Token has already been used"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
     email = payload.get("sub")
     uuid = payload.get("iss")
     if not email:
@@ -78,7 +83,7 @@ def Verify_signup_token(request):
         return Response({"error": "User's account has been deactivated"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
     user.verified=True
     user.save(update_fields=["verified"])
-    cache.set(f"user_profile_{user.user_id}", user)
+    set_entity(f"user_profile_{user.user_id}", user)
     return Response({"success": "Email has been verified successfully"}, status=status.HTTP_200_OK, template_name="listings/valid_email.html")
 
 class LoginApiView(APIView):
@@ -100,40 +105,21 @@ class LoginApiView(APIView):
         if not user.is_active:
             return Response({"error": "User's account has been deactivated"}, status=status.HTTP_400_BAD_REQUEST)
         token, _ = Token.objects.get_or_create(user=user)
-        cache.set(f"user_profile_{user.user_id}", user)
+        fill_entity(f"user_profile_{user.user_id}", user)
         return Response({'token': token.key}, status=status.HTTP_200_OK)
    
 class ModifyUserViewset(viewsets.ModelViewSet):
     serializer_class = UserSerializer
+    permission_classes = [IsAdmin]
     lookup_field = "uuid"
 
     def get_queryset(self):
-        users = cache.get("users")
-        if users is None or users == []:
-            all_users = list(User.objects.filter(is_active=True, verified=True))
-            cache.set("users", all_users)
-            users = all_users
-        return users
+        return load_index("users_index", User.objects.filter(is_active=True, verified=True), "user_profile_", "user_id")
 
     def list(self, request, *args, **kwargs):
-        admin_exist = check_single_user_in_cache_db(request.user.user_id)
-        if not admin_exist:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        checking = check_if_is_admin(admin_exist)
-        if not checking:
-            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)
-    
-        serializer = self.serializer_class(self.get_queryset(), many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return cached_json_response(request, "users", lambda: self.serializer_class(self.get_queryset(), many=True).data)
 
     def retrieve(self, request, *args, **kwargs):
-        admin_exist = check_single_user_in_cache_db(request.user.user_id)
-        if not admin_exist:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        checking = check_if_is_admin(admin_exist)
-        if not checking:
-            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)      
-
         user_uuid = kwargs.get("uuid")
         if user_uuid is None:
             return Response({'error': 'User UUID is missing'}, status=status.HTTP_400_BAD_REQUEST)
@@ -144,12 +130,6 @@ class ModifyUserViewset(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):      
-        admin_exist = check_single_user_in_cache_db(request.user.user_id)
-        if not admin_exist:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        checking = check_if_is_admin(admin_exist)
-        if not checking:
-            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)
         user_uuid = kwargs.get("uuid")
         if user_uuid is None:
             return Response({'error': 'User UUID is missing'}, status=status.HTTP_400_BAD_REQUEST)
@@ -163,23 +143,19 @@ class ModifyUserViewset(viewsets.ModelViewSet):
         Token.objects.filter(user=user).delete()
         email_verification.delay(subject="Account Deactivation", email=user.email,
             txt_template_name="listings/text_mails/deactivate.txt",verification_url=f"{user.first_name} {user.last_name}")
-        return Response({'message': f"{user.first_name} {user.last_name}'s account has been deactivated successfully by {admin_exist.first_name}"},
+        return Response({'message': f"{user.first_name} {user.last_name}'s account has been deactivated successfully by {request.user.first_name}"},
             status=status.HTTP_200_OK)
 
 class UserProfileViewset(viewsets.ModelViewSet):
     serializer_class = UserSerializer
 
     def retrieve(self, request, *args, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user
         serializer = self.serializer_class(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def update(self, request, *args, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user
 
         serializer = self.serializer_class(instance=user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -193,9 +169,7 @@ class UserProfileViewset(viewsets.ModelViewSet):
         return Response({"success": "Profile has been updated successfully"}, status=status.HTTP_200_OK)
     
     def destroy(self, request, *args, **kwargs):
-        get_user = check_single_user_in_cache_db(request.user.user_id)
-        if not get_user:
-            return Response({"error": "User's account has been deactivated before now!"}, status=status.HTTP_400_BAD_REQUEST)
+        get_user = request.user
         token = get_token(user_id=get_user.user_id, email=get_user.email)
         email_verification.delay(subject="Deactivate account?", email=get_user.email,
                                txt_template_name="listings/text_mails/deactivate_confirmation.txt",
@@ -221,6 +195,8 @@ def VerifyEmailUpdate(request):
     payload = decode_token(token)
     if not payload:
         return Response({"error": "Invalid or expired token"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
+    if not consume_token(payload):
+        return Response({"error": "Token has already been used"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
     email = payload.get("sub")
     uuid = payload.get("iss")
     if not email:
@@ -252,6 +228,8 @@ def VerifyAcctDeactivation(request):
     payload = decode_token(token)
     if not payload:
         return Response({"error": "Invalid or expired token"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
+    if not consume_token(payload):
+        return Response({"error": "Token has already been used"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
     email = payload.get("sub")
     uuid = payload.get("iss")
     if not email:
@@ -308,6 +286,8 @@ def VerifyPasswordReset(request):
     payload = decode_token(token)
     if not payload:
         return Response({"error": "Invalid or expired token"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
+    if not consume_token(payload):
+        return Response({"error": "Token has already been used"}, status=status.HTTP_400_BAD_REQUEST, template_name="listings/invalid_email.html")
     email = payload.get("sub")
     uuid = payload.get("iss")
     if not email:
@@ -352,16 +332,6 @@ class Change_passwordView(APIView):
     http_method_names = ["post"]
 
     def post(self, request, *args, **kwargs):
-        user_profile = f"user_profile_{request.user.user_id}"
-        get_user = cache.get(user_profile)
-        if not get_user:
-            cache.set(f"user_profile_{request.user.user_id}", request.user)
-            get_user = request.user
-        if not get_user.is_active:
-            return Response({'error': "User's account as been deactivated"}, status=status.HTTP_400_BAD_REQUEST)
-        if not get_user.verified:
-            return Response({'error': "User's account has not been verified"}, status=status.HTTP_400_BAD_REQUEST)
-        
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         old_password = serializer.validated_data['old_password']
@@ -379,11 +349,6 @@ class LogoutView(APIView):
     serializer_class = None  # avoids guessing for swaggerAPI
 
     def post(self, request, *args, **kwargs):
-        user_profile = f"user_profile_{request.user.user_id}"
-        get_user = cache.get(user_profile)
-        if not get_user:
-            cache.set(f"user_profile_{request.user.user_id}", request.user)
-            get_user = request.user
-        Token.objects.get(user=get_user).delete()
+        Token.objects.filter(user=request.user).delete()
         return Response({"success": "Logout successfully"}, status=status.HTTP_200_OK)
     
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from listings.models import User, Property, Booking
+from listings.utils.helper_functions import overlapping_bookings
+from datetime import date, timedelta
+from decimal import Decimal
+import random, statistics, time
+
+BENCH_EMAIL = 'bench-availability@example.com'
+BATCH = 10000
+
+class Command(BaseCommand):
+    help = 'Seed a large booking table and time the availability query that backs property/available/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=5000, help='Benchmark properties to seed')
+        parser.add_argument('--bookings', type=int, default=2000000, help='Benchmark bookings to seed')
+        parser.add_argument('--queries', type=int, default=50, help='Random date ranges to time')
+        parser.add_argument('--baseline', action='store_true', help='Also time filtering the bookings in Python')
+        parser.add_argument('--flush', action='store_true', help='Delete the benchmark data and exit')
+
+    def seed(self, owner, properties, bookings):
+        """Top the benchmark data up to the requested sizes, so reruns skip the slow part"""
+        existing = Property.objects.filter(user=owner).count()
+        Property.objects.bulk_create(
+            [Property(user=owner, name=f'Bench {i}', description='Benchmark property', location='Bench',
+                      pricepernight=Decimal(random.randint(20, 400)), verification='verified')
+             for i in range(existing, properties)], batch_size=BATCH)
+        property_ids = list(Property.objects.filter(user=owner).values_list('property_id', flat=True))
+
+        existing = Booking.objects.filter(user=owner).count()
+        started = time.monotonic()
+        today = date.today()
+        chunk = []
+        for _ in range(existing, bookings):
+            start_date = today + timedelta(days=random.randint(0, 365))
+            nights = random.randint(1, 14)
+            chunk.append(Booking(property_id=random.choice(property_ids), user=owner, start_date=start_date,
+                                 end_date=start_date + timedelta(days=nights), total_price=Decimal(nights * 100),
+                                 status=random.choices(['confirmed', 'pending', 'canceled'], [7, 2, 1])[0]))
+            if len(chunk) == BATCH:
+                Booking.objects.bulk_create(chunk)
+                chunk = []
+        if chunk:
+            Booking.objects.bulk_create(chunk)
+        if bookings > existing:
+            self.stdout.write(f"Seeded {bookings - existing} bookings in {time.monotonic() - started:.1f}s")
+        return property_ids
+
+    def random_range(self):
+        check_in = date.today() + timedelta(days=random.randint(0, 365))
+        return check_in, check_in + timedelta(days=random.randint(1, 10))
+
+    def available(self, owner, check_in, check_out):
+        booked = overlapping_bookings(OuterRef('pk'), check_in, check_out)
+        return Property.objects.filter(user=owner, verification='verified').filter(~Exists(booked))
+
+    def report(self, name, timings):
+        timings = sorted(timings)
+        p95 = timings[int(0.95 * (len(timings) - 1))]
+        self.stdout.write(f"{name:<28}{statistics.median(timings):>10.2f}{p95:>10.2f}{timings[-1]:>10.2f}")
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            deleted, _ = User.objects.filter(email=BENCH_EMAIL).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} benchmark rows"))
+            return
+        owner = User.objects.filter(email=BENCH_EMAIL).first()
+        if owner is None:
+            owner = User.objects.create_user('Bench', 'Availability', BENCH_EMAIL, '0000000000')
+        self.seed(owner, options['properties'], options['bookings'])
+
+        ranges = [self.random_range() for _ in range(options['queries'])]
+        self.stdout.write(self.available(owner, *ranges[0]).order_by('-created_at', '-property_id')[:20].explain())
+        self.stdout.write(f"{'query (ms)':<28}{'p50':>10}{'p95':>10}{'max':>10}")
+        page, count = [], []
+        for check_in, check_out in ranges:
+            started = time.perf_counter()
+            list(self.available(owner, check_in, check_out).order_by('-created_at', '-property_id')[:20])
+            page.append(1000 * (time.perf_counter() - started))
+            started = time.perf_counter()
+            self.available(owner, check_in, check_out).count()
+            count.append(1000 * (time.perf_counter() - started))
+        self.report('first page of 20', page)
+        self.report('count of all free', count)
+
+        if options['baseline']:
+            baseline = []
+            for check_in, check_out in ranges[:3]:
+                started = time.perf_counter()
+                booked = {property_id for property_id, start_date, end_date in
+                          Booking.objects.filter(user=owner).exclude(status='canceled')
+                          .values_list('property_id', 'start_date', 'end_date').iterator(chunk_size=BATCH)
+                          if start_date < check_out and end_date > check_in}
+                Property.objects.filter(user=owner).exclude(property_id__in=booked).count()
+                baseline.append(1000 * (time.perf_counter() - started))
+            self.report('python filter (baseline)', baseline)
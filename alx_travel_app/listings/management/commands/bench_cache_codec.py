@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from listings.models import User, Host, Property
+from listings.utils.codec import encode, decode
+import pickle, time, uuid
+
+class Command(BaseCommand):
+    help = 'Compare pickled model instances with the compact cache codec (size and CPU)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Instances per model')
+
+    def build(self, model, i):
+        now = timezone.now()
+        if model is User:
+            return User(first_name='John', last_name='Doe', email=f'user{i}@example.com',
+                        phone_number=f'{i:010d}', password='pbkdf2_sha256$870000$' + 'x' * 66,
+                        created_at=now, updated_at=now, verified=True)
+        if model is Host:
+            return Host(host_id=uuid.uuid4(), bio='I love hosting guests.', address='12 Beach Road',
+                        identity='A1234567', social_link=f'https://example.com/host{i}',
+                        created_at=now, updated_at=now)
+        return Property(user_id=uuid.uuid4(), name='Beach House', description='A beautiful beach house.',
+                        location='Beach', pricepernight='200.00', verification='verified',
+                        created_at=now, updated_at=now)
+
+    def measure(self, instances, dumps, loads):
+        started = time.perf_counter()
+        payloads = [dumps(instance) for instance in instances]
+        dumped = time.perf_counter() - started
+        started = time.perf_counter()
+        for payload in payloads:
+            loads(payload)
+        loaded = time.perf_counter() - started
+        size = sum(len(payload) for payload in payloads) / len(payloads)
+        return size, dumped * 1e6 / len(payloads), loaded * 1e6 / len(payloads)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        self.stdout.write(f"{'model':<10}{'format':<8}{'bytes':>8}{'dump us':>10}{'load us':>10}")
+        for model in (User, Host, Property):
+            instances = [self.build(model, i) for i in range(count)]
+            results = {
+                'pickle': self.measure(instances, pickle.dumps, pickle.loads),
+                'codec': self.measure(instances, encode, lambda payload: decode(model, payload)),
+            }
+            for name, (size, dumped, loaded) in results.items():
+                self.stdout.write(f"{model.__name__:<10}{name:<8}{size:>8.0f}{dumped:>10.2f}{loaded:>10.2f}")
+            saving = 100 * (1 - results['codec'][0] / results['pickle'][0])
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: codec payloads are {saving:.0f}% smaller"))
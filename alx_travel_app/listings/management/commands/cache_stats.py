@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from listings.utils.cache_utils import get_redis, family_for_key
+import re
+
+# Keys written through django.core.cache carry a ":<version>:" prefix.
+VERSION_PREFIX = re.compile(r"^:\d+:")
+
+class Command(BaseCommand):
+    help = 'Report key counts, memory usage and keys without a TTL per cached key family'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500, help='Keys inspected per pipeline round trip')
+
+    def inspect(self, client, keys, stats):
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key)
+            pipe.ttl(key)
+        results = pipe.execute()
+        for key, size, ttl in zip(keys, results[::2], results[1::2]):
+            family = family_for_key(VERSION_PREFIX.sub("", key.decode(errors="replace")))
+            entry = stats.setdefault(family, {"keys": 0, "bytes": 0, "no_ttl": 0})
+            entry["keys"] += 1
+            entry["bytes"] += size or 0
+            if ttl == -1:
+                entry["no_ttl"] += 1
+
+    def handle(self, *args, **options):
+        client = get_redis()
+        stats = {}
+        batch = []
+        for key in client.scan_iter(count=options['batch']):
+            batch.append(key)
+            if len(batch) >= options['batch']:
+                self.inspect(client, batch, stats)
+                batch = []
+        if batch:
+            self.inspect(client, batch, stats)
+
+        self.stdout.write(f"{'family':<14}{'keys':>10}{'bytes':>14}{'avg':>10}{'no ttl':>10}")
+        for family, entry in sorted(stats.items(), key=lambda item: -item[1]["bytes"]):
+            average = entry["bytes"] / entry["keys"]
+            self.stdout.write(f"{family:<14}{entry['keys']:>10}{entry['bytes']:>14}{average:>10.0f}{entry['no_ttl']:>10}")
+        total_keys = sum(entry["keys"] for entry in stats.values())
+        total_bytes = sum(entry["bytes"] for entry in stats.values())
+        self.stdout.write(self.style.SUCCESS(f"{total_keys} keys using {total_bytes} bytes"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from listings.models import Property
+from listings.utils.search import rebuild_search_index, search_backend
+import time
+
+class Command(BaseCommand):
+    help = 'Rebuild the property full-text index, e.g. after bulk imports that bypassed the model signals'
+
+    def handle(self, *args, **options):
+        if not search_backend():
+            self.stdout.write(self.style.WARNING('This database has no full-text index, search falls back to icontains'))
+            return
+        started = time.monotonic()
+        count = rebuild_search_index(Property.objects.filter(verification='verified'))
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} properties in {time.monotonic() - started:.2f}s"))
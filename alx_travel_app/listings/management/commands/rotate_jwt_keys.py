@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from listings.utils.keys import key_id, key_provider
+import os, time
+
+class Command(BaseCommand):
+    help = 'Generate a new JWT signing key, keeping the old public key valid for tokens already sent'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bits', type=int, default=2048, help='RSA key size')
+        parser.add_argument('--prune', type=int, metavar='SECONDS',
+                            help='Also delete retired public keys older than this, '
+                                 'once every token they signed has expired')
+
+    def write(self, path, data, mode):
+        """Replace a file in one rename, so readers see the old or the new key, never half of one"""
+        temporary = f"{path}.tmp"
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+    def public_pem(self, public_key):
+        return public_key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+
+    def handle(self, *args, **options):
+        if not settings.JWT_ALGORITHM.startswith(('RS', 'PS')):
+            raise CommandError(f"Only RSA keys can be rotated, JWT_ALGORITHM is {settings.JWT_ALGORITHM}")
+        retired_dir = settings.JWT_RETIRED_KEYS_DIR
+        os.makedirs(retired_dir, exist_ok=True)
+
+        # Retire the current key first, workers must accept its tokens before anything signs with the new one.
+        if os.path.exists(settings.JWT_PRIVATE_KEY_PATH):
+            with open(settings.JWT_PRIVATE_KEY_PATH, "rb") as file:
+                current = serialization.load_pem_private_key(file.read(), password=None).public_key()
+            self.write(os.path.join(retired_dir, f"{key_id(current)}.pem"), self.public_pem(current), 0o644)
+            self.stdout.write(f"Retired key {key_id(current)}")
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=options['bits'])
+        self.write(settings.JWT_PUBLIC_KEY_PATH, self.public_pem(private_key.public_key()), 0o644)
+        self.write(settings.JWT_PRIVATE_KEY_PATH, private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()), 0o600)
+
+        if options['prune'] is not None:
+            cutoff = time.time() - options['prune']
+            for name in os.listdir(retired_dir):
+                path = os.path.join(retired_dir, name)
+                if name.endswith(".pem") and os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    self.stdout.write(f"Pruned key {name[:-4]}")
+
+        key_provider.reload()
+        self.stdout.write(self.style.SUCCESS(
+            f"Signing with key {key_id(private_key.public_key())}, other processes pick it up "
+            f"within {settings.JWT_KEY_CHECK_INTERVAL:g}s"))
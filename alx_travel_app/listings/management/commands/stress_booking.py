@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from listings.models import User, Property, Booking
+from listings.utils.helper_functions import create_booking
+from datetime import date, timedelta
+from decimal import Decimal
+import random, threading, time
+
+BENCH_EMAIL = 'stress-booking-{}@example.com'
+
+class Command(BaseCommand):
+    help = 'Book one hot property from many threads at once, report throughput and check for double bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent guests')
+        parser.add_argument('--attempts', type=int, default=200, help='Booking attempts per guest')
+        parser.add_argument('--days', type=int, default=90, help='Days ahead the stays are spread over')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated guests, property and bookings')
+
+    def guest(self, user, property, options, results):
+        counts = {'booked': 0, 'conflicts': 0, 'errors': 0}
+        try:
+            for _ in range(options['attempts']):
+                start_date = date.today() + timedelta(days=random.randint(1, options['days']))
+                end_date = start_date + timedelta(days=random.randint(1, 5))
+                try:
+                    booking = create_booking(property, user, start_date, end_date, property.pricepernight)
+                except OperationalError:
+                    counts['errors'] += 1
+                    continue
+                counts['booked' if booking else 'conflicts'] += 1
+        finally:
+            connection.close()
+            results.append(counts)
+
+    def double_bookings(self, property):
+        """Pairs of consecutive live bookings (by start date) that share a night"""
+        bookings = list(Booking.objects.filter(property=property).exclude(status='canceled')
+                        .order_by('start_date').values_list('start_date', 'end_date'))
+        return sum(1 for previous, current in zip(bookings, bookings[1:]) if current[0] < previous[1])
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['attempts'] < 1:
+            raise CommandError('--threads and --attempts must be positive')
+        suffix = int(time.time())
+        host = User.objects.create_user('Stress', 'Host', BENCH_EMAIL.format(f'host-{suffix}'), '0000000000')
+        guests = [User.objects.create_user('Stress', 'Guest', BENCH_EMAIL.format(f'{suffix}-{i}'), f'{i:010d}')
+                  for i in range(options['threads'])]
+        property = Property.objects.create(user=host, name='Hot property', description='Stress test property',
+                                           location='Stress', pricepernight=Decimal('100.00'), verification='verified')
+        try:
+            results = []
+            threads = [threading.Thread(target=self.guest, args=(guest, property, options, results)) for guest in guests]
+            started = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+
+            totals = {name: sum(counts[name] for counts in results) for name in ('booked', 'conflicts', 'errors')}
+            attempts = sum(totals.values())
+            self.stdout.write(f"{options['threads']} threads, {attempts} attempts in {elapsed:.2f}s "
+                              f"({attempts / elapsed:.0f} attempts/s, {totals['booked'] / elapsed:.0f} bookings/s)")
+            self.stdout.write(f"booked {totals['booked']}, rejected as overlapping {totals['conflicts']}, "
+                              f"database errors {totals['errors']}")
+            overlaps = self.double_bookings(property)
+            if overlaps:
+                raise CommandError(f"{overlaps} overlapping bookings were created")
+            self.stdout.write(self.style.SUCCESS('No overlapping bookings'))
+        finally:
+            if not options['keep']:
+                User.objects.filter(user_id__in=[host.user_id, *(guest.user_id for guest in guests)]).delete()
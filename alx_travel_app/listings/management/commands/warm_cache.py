@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+from listings.models import User, Host, Property
+from listings.utils.cache_utils import get_redis, fill_entities, index_add_many, mark_index_ready
+import time
+
+CHECKPOINT_TTL = 24 * 60 * 60
+DONE = "done"
+
+# family: (queryset, cache key prefix, id field, ordered id index or None)
+FAMILIES = {
+    "users": (lambda: User.objects.filter(is_active=True, verified=True), "user_profile_", "user_id", "users_index"),
+    "hosts": (lambda: Host.objects.all(), "host_profile_", "host_id", None),
+    "properties": (lambda: Property.objects.filter(verification='verified'), "property_", "property_id", None),
+}
+
+class Command(BaseCommand):
+    help = 'Bulk-load the hot cache families (active users, hosts, verified properties) after a deploy or flush'
+
+    def add_arguments(self, parser):
+        parser.add_argument('families', nargs='*', help=f"Families to warm ({', '.join(FAMILIES)}), all by default")
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per query chunk and per set_many')
+        parser.add_argument('--restart', action='store_true', help='Ignore checkpoints left by a previous run')
+
+    def warm(self, family, chunk_size, restart):
+        make_queryset, key_prefix, id_field, index = FAMILIES[family]
+        client = get_redis()
+        checkpoint_key = f"warm_cache_checkpoint_{family}"
+        checkpoint = None if restart else client.get(checkpoint_key)
+        if checkpoint is not None and checkpoint.decode() == DONE:
+            self.stdout.write(f"{family}: already warmed, use --restart to warm it again")
+            return 0
+        # Walk the table in id order so an interrupted run resumes after the last chunk written.
+        queryset = make_queryset().order_by(id_field)
+        if checkpoint is not None:
+            queryset = queryset.filter(**{f"{id_field}__gt": checkpoint.decode()})
+            self.stdout.write(f"{family}: resuming after {checkpoint.decode()}")
+
+        started = time.monotonic()
+        count = 0
+        chunk = []
+
+        def flush():
+            fill_entities({f"{key_prefix}{getattr(instance, id_field)}": instance for instance in chunk})
+            pipe = client.pipeline(transaction=False)
+            if index:
+                index_add_many(pipe, index, chunk, id_field)
+            pipe.set(checkpoint_key, str(getattr(chunk[-1], id_field)), ex=CHECKPOINT_TTL)
+            pipe.execute()
+
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(instance)
+            if len(chunk) == chunk_size:
+                flush()
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            flush()
+            count += len(chunk)
+
+        pipe = client.pipeline(transaction=False)
+        if index:
+            mark_index_ready(pipe, index)
+        pipe.set(checkpoint_key, DONE, ex=CHECKPOINT_TTL)
+        pipe.execute()
+
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(f"{family}: {count} entries in {elapsed:.2f}s ({rate:.0f}/s)")
+        return count
+
+    def handle(self, *args, **options):
+        families = options['families'] or list(FAMILIES)
+        unknown = set(families) - set(FAMILIES)
+        if unknown:
+            raise CommandError(f"Unknown families: {', '.join(sorted(unknown))}")
+        started = time.monotonic()
+        total = sum(self.warm(family, options['chunk_size'], options['restart']) for family in families)
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(f"Warmed {total} entries in {elapsed:.2f}s ({rate:.0f}/s)"))
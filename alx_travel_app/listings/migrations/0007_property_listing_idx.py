@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_property_verification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['verification', '-created_at', '-property_id'], name='property_listing_idx'),
+        ),
+    ]
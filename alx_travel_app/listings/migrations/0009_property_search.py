@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:02
+
+from django.db import migrations
+
+# Same table as listings.utils.search, spelled out here so the migration does not depend on app code.
+SEARCH_TABLE = "listings_property_search"
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "property_id UNINDEXED, name, description, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (property_id, name, description) "
+            "SELECT property_id, name, description FROM listings_property WHERE verification = 'verified'"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "property_id uuid PRIMARY KEY REFERENCES listings_property (property_id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)")
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (property_id, document) "
+            "SELECT property_id, setweight(to_tsvector('english', name), 'A') || "
+            "setweight(to_tsvector('english', description), 'B') "
+            "FROM listings_property WHERE verification = 'verified'"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_property_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0009_property_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'canceled'), _negated=True), fields=['property', 'start_date', 'end_date'], name='booking_interval_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:27
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_booking_interval_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='weekendpricepernight',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='SeasonalRate',
+            fields=[
+                ('rate_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('pricepernight', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seasonal_rates', to='listings.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['property', 'start_date', 'end_date'], name='seasonal_rate_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:28
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_aggregates(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    Review = apps.get_model('listings', 'Review')
+    totals = Review.objects.values('property_id').annotate(count=Count('review_id'), total=Sum('rating'))
+    for row in totals.iterator(chunk_size=2000):
+        Property.objects.filter(property_id=row['property_id']).update(review_count=row['count'], rating_sum=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_property_pricing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
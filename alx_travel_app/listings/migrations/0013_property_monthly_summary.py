@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:29
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0012_property_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyMonthlySummary',
+            fields=[
+                ('summary_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('booked_nights', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='listings.property')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('property', 'month'), name='property_month_unique')],
+            },
+        ),
+    ]
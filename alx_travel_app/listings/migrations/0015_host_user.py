@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_users(apps, schema_editor):
+    Host = apps.get_model('listings', 'Host')
+    User = apps.get_model('listings', 'User')
+    # A host row whose user no longer exists cannot be linked, it is dropped.
+    Host.objects.exclude(host__in=User.objects.values('user_id')).delete()
+    Host.objects.update(user_id=models.F('host'))
+
+
+def unlink_users(apps, schema_editor):
+    Host = apps.get_model('listings', 'Host')
+    Host.objects.update(host=models.F('user_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0014_booking_property_start_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='host',
+            name='user',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='host_profile', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='host',
+            name='host',
+            field=models.UUIDField(default=None, null=True, unique=True),
+        ),
+        migrations.RunPython(link_users, unlink_users),
+        migrations.RemoveField(
+            model_name='host',
+            name='host',
+        ),
+        migrations.RenameField(
+            model_name='host',
+            old_name='user',
+            new_name='host',
+        ),
+        migrations.AlterField(
+            model_name='host',
+            name='host',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='host_profile', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:10
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def drop_duplicate_reviews(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    Review = apps.get_model('listings', 'Review')
+    duplicates = (Review.objects.values('property_id', 'user_id')
+                  .annotate(count=Count('review_id')).filter(count__gt=1))
+    property_ids = set()
+    for row in duplicates.iterator(chunk_size=2000):
+        # Keep the first review of each guest, the later ones were double submits.
+        kept = (Review.objects.filter(property_id=row['property_id'], user_id=row['user_id'])
+                .order_by('created_at', 'review_id').values_list('review_id', flat=True)[0])
+        Review.objects.filter(property_id=row['property_id'], user_id=row['user_id']).exclude(review_id=kept).delete()
+        property_ids.add(row['property_id'])
+    for property_id in property_ids:
+        totals = Review.objects.filter(property_id=property_id).aggregate(count=Count('review_id'), total=Sum('rating'))
+        Property.objects.filter(property_id=property_id).update(review_count=totals['count'], rating_sum=totals['total'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0015_host_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('property', 'user'), name='review_property_user_uniq'),
+        ),
+    ]
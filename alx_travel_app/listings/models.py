@@ -83,9 +83,26 @@ class Property(models.Model):
         ('rejected', 'Rejected')
     ], default='pending')
     pricepernight = models.DecimalField(max_digits=10, decimal_places=2)
+    weekendpricepernight = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Kept in step with Review rows by the review signals, never written directly.
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['verification', '-created_at', '-property_id'], name='property_listing_idx'),
+            models.Index(fields=['verification', 'status', 'location'], name='property_search_idx'),
+            models.Index(fields=['verification', 'pricepernight'], name='property_price_idx'),
+        ]
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
     def save(self, *args, **kwargs):
         if self.name:
             self.name = self.name.strip().title()
@@ -96,6 +113,10 @@ class Property(models.Model):
         if self.slug:
             slug = f"{self.name.replace(' ', '-')}_{self.host}"
             self.slug = slug.strip().lower()
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # A full save of a stale instance must not roll back the rating aggregates.
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in ('review_count', 'rating_sum')]
         super().save(*args, **kwargs)
 
 class Booking(models.Model):
@@ -112,6 +133,28 @@ class Booking(models.Model):
     ], default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Availability checks look for live bookings of a property overlapping a date range.
+            models.Index(fields=['property', 'start_date', 'end_date'], name='booking_interval_idx',
+                         condition=~models.Q(status='canceled')),
+            # Host booking lists walk each property's bookings in start date order, canceled ones included.
+            models.Index(fields=['property', 'start_date', 'booking_id'], name='booking_property_start_idx'),
+        ]
+
+class SeasonalRate(models.Model):
+    rate_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='seasonal_rates')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    pricepernight = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'start_date', 'end_date'], name='seasonal_rate_idx'),
+        ]
+
 class Review(models.Model):
     review_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='reviews')  
@@ -120,6 +163,12 @@ class Review(models.Model):
     comment = models.TextField(null=False, blank=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One review per guest and property, enforced even for concurrent requests.
+            models.UniqueConstraint(fields=['property', 'user'], name='review_property_user_uniq'),
+        ]
+
 class Payment(models.Model):
     payment_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='payments')  
@@ -131,8 +180,23 @@ class Payment(models.Model):
     ], default='pending')
     transaction_id = models.CharField(max_length=255, unique=True)
 
+class PropertyMonthlySummary(models.Model):
+    """Bookings, booked nights and paid revenue of a property in one calendar month"""
+    summary_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='monthly_summaries')
+    month = models.DateField()
+    bookings = models.PositiveIntegerField(default=0)
+    booked_nights = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['property', 'month'], name='property_month_unique'),
+        ]
+
 class Host(models.Model):
-    host = models.UUIDField(default=None, unique=True)
+    host = models.OneToOneField(User, on_delete=models.CASCADE, related_name='host_profile')
     bio = models.TextField(null=False, blank=False)
     address = models.CharField(max_length=100, null=False, blank=False)
     identity = models.CharField(max_length=50, null=False, blank=False)
@@ -1,7 +1,19 @@
 from rest_framework import serializers
+from django.conf import settings
 from .models import Host
+from .utils.availability import EPOCH
 from datetime import datetime
 
+def validate_stay(check_in, check_out):
+    """Errors of a stay request, keyed by field, empty when it is valid"""
+    if check_in < datetime.now().date():
+        return {'check_in': 'check_in cannot be in the past.'}
+    if check_out <= check_in:
+        return {'check_out': 'check_out must be after check_in.'}
+    if (check_out - check_in).days > settings.STAY_MAX_NIGHTS:
+        return {'check_out': f'A stay lasts at most {settings.STAY_MAX_NIGHTS} nights.'}
+    return {}
+
 def check_date(value):
     now = datetime.now().date()
     time_input = datetime.strptime(str(value), '%Y-%m-%d').date()
@@ -15,6 +27,10 @@ class PropertySerializer(serializers.Serializer):
     description = serializers.CharField(trim_whitespace=True)
     location = serializers.CharField(max_length=255, trim_whitespace=True)
     pricepernight = serializers.DecimalField(max_digits=10, decimal_places=2)
+    weekendpricepernight = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    status = serializers.CharField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
 
@@ -38,8 +54,87 @@ class PropertySerializer(serializers.Serializer):
         instance.save()
         return instance
 
+class PropertyFilterSerializer(serializers.Serializer):
+    location = serializers.CharField(max_length=255, trim_whitespace=True, required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    status = serializers.ChoiceField(choices=['available', 'unavailable', 'booked'], required=False)
+    sort = serializers.ChoiceField(choices=['newest', 'price_asc', 'price_desc'], default='newest')
+    page_size = serializers.IntegerField(min_value=1, required=False)
+    cursor = serializers.CharField(required=False)
+
+    def validate_location(self, value):
+        # Locations are stored title-cased, so an exact indexed match works for any casing.
+        return value.strip().title()
+
+    def validate(self, attrs):
+        min_price = attrs.get('min_price')
+        max_price = attrs.get('max_price')
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError({'min_price': 'min_price cannot be greater than max_price.'})
+        return super().validate(attrs)
+
+class PropertyAvailabilitySerializer(PropertyFilterSerializer):
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        errors = validate_stay(attrs['check_in'], attrs['check_out'])
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+class PropertyQuoteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), min_length=1, max_length=settings.PROPERTY_QUOTE_MAX_IDS)
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+
+    def validate(self, attrs):
+        errors = validate_stay(attrs['check_in'], attrs['check_out'])
+        if errors:
+            raise serializers.ValidationError(errors)
+        return super().validate(attrs)
+
+class SeasonalRateSerializer(serializers.Serializer):
+    rate_id = serializers.UUIDField(read_only=True)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    pricepernight = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    created_at = serializers.DateTimeField(read_only=True)
+
+    def validate(self, attrs):
+        if attrs['end_date'] <= attrs['start_date']:
+            raise serializers.ValidationError({'end_date': 'end_date must be after start_date.'})
+        return super().validate(attrs)
+
+class PropertyCalendarSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), min_length=1, max_length=settings.PROPERTY_MAX_PAGE_SIZE)
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['start'] < EPOCH:
+            raise serializers.ValidationError({'start': f'start cannot be before {EPOCH}.'})
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError({'end': 'end must be after start.'})
+        if (attrs['end'] - attrs['start']).days > settings.PROPERTY_CALENDAR_MAX_DAYS:
+            raise serializers.ValidationError({'end': f'A calendar spans at most {settings.PROPERTY_CALENDAR_MAX_DAYS} days.'})
+        return super().validate(attrs)
+
+class PropertySearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+class BookingGuestSerializer(serializers.Serializer):
+    user_id = serializers.UUIDField(read_only=True)
+    first_name = serializers.CharField(read_only=True)
+    last_name = serializers.CharField(read_only=True)
+    email = serializers.EmailField(read_only=True)
+
 class HostSerializer(serializers.Serializer):
-    host = serializers.UUIDField(read_only=True)
+    host = serializers.UUIDField(source='host_id', read_only=True)
+    user = BookingGuestSerializer(source='host', read_only=True)
     bio = serializers.CharField(read_only=True)
     address = serializers.CharField(read_only=True)
     identity = serializers.CharField(read_only=True)
@@ -62,7 +157,7 @@ class HostSerializer(serializers.Serializer):
         return instance
 
 class HostProfileSerializer(serializers.Serializer):
-    host = serializers.UUIDField(read_only=True)
+    host = serializers.UUIDField(source='host_id', read_only=True)
     bio = serializers.CharField(trim_whitespace=True)
     address = serializers.CharField(max_length=100, trim_whitespace=True)
     identity = serializers.CharField(max_length=50, trim_whitespace=True)
@@ -71,7 +166,7 @@ class HostProfileSerializer(serializers.Serializer):
     verification_status = serializers.CharField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
-    property = PropertySerializer(many=True, read_only=True)
+    property = PropertySerializer(source='host.properties', many=True, read_only=True)
 
     def create(self, validated_data):
         link = validated_data['social_link']
@@ -93,9 +188,18 @@ class HostProfileSerializer(serializers.Serializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value.strip())
         instance.updated_at = datetime.today()
-        instance.save()
+        # The instance comes from the auth cache, only write what this update changed.
+        instance.save(update_fields=[*validated_data, 'updated_at'])
         return instance
     
+class ReviewSerializer(serializers.Serializer):
+    review_id = serializers.UUIDField(read_only=True)
+    property_id = serializers.UUIDField(read_only=True)
+    user = serializers.UUIDField(source='user_id', read_only=True)
+    rating = serializers.IntegerField(min_value=1, max_value=5)
+    comment = serializers.CharField(trim_whitespace=True)
+    created_at = serializers.DateTimeField(read_only=True)
+
 class BookingSerializer(serializers.Serializer):
     booking_id = serializers.UUIDField(read_only=True)
     user = serializers.UUIDField(read_only=True)
@@ -121,10 +225,56 @@ class BookingSerializer(serializers.Serializer):
         if not check_date(value):
             raise serializers.ValidationError({'error': 'You cannot book for a past date (end_date)'})
         return value
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        if start_date and end_date and end_date <= start_date:
+            raise serializers.ValidationError({'error': 'end_date must be after start_date'})
+        return super().validate(attrs)
     
     def create(self, validated_data):
         return validated_data
     
+class DashboardFilterSerializer(serializers.Serializer):
+    start = serializers.DateField(input_formats=['%Y-%m'])
+    end = serializers.DateField(input_formats=['%Y-%m'])
+
+    def validate(self, attrs):
+        months = (attrs['end'].year - attrs['start'].year) * 12 + attrs['end'].month - attrs['start'].month + 1
+        if months < 1:
+            raise serializers.ValidationError({'end': 'end cannot be before start.'})
+        if months > settings.DASHBOARD_MAX_MONTHS:
+            raise serializers.ValidationError({'end': f'The dashboard covers at most {settings.DASHBOARD_MAX_MONTHS} months.'})
+        return super().validate(attrs)
+
+class HostBookingSerializer(serializers.Serializer):
+    booking_id = serializers.UUIDField(read_only=True)
+    property_id = serializers.UUIDField(read_only=True)
+    property_name = serializers.CharField(source='property.name', read_only=True)
+    guest = BookingGuestSerializer(source='user', read_only=True)
+    start_date = serializers.DateField(read_only=True)
+    end_date = serializers.DateField(read_only=True)
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    status = serializers.CharField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+
+class HostBookingFilterSerializer(serializers.Serializer):
+    property = serializers.UUIDField(required=False)
+    status = serializers.ChoiceField(choices=['pending', 'confirmed', 'canceled'], required=False)
+    start_from = serializers.DateField(required=False)
+    start_to = serializers.DateField(required=False)
+    sort = serializers.ChoiceField(choices=['start_asc', 'start_desc'], default='start_asc')
+    page_size = serializers.IntegerField(min_value=1, required=False)
+    cursor = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        start_from = attrs.get('start_from')
+        start_to = attrs.get('start_to')
+        if start_from and start_to and start_from > start_to:
+            raise serializers.ValidationError({'start_from': 'start_from cannot be after start_to.'})
+        return super().validate(attrs)
+
 class PaymentSerializer(serializers.Serializer):
     payment_id = serializers.UUIDField(read_only=True)
     booking = BookingSerializer(read_only=True)
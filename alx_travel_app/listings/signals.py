@@ -1,83 +1,149 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import User, Host, Property
-from django.core.cache import cache
+from .models import User, Host, Property, Booking, SeasonalRate, Review, Payment
+from django.db.models import F
+from .utils.cache_utils import bump_generation, index_add, index_remove, set_entity, delete_entity
+from .utils.search import sync_property, unindex_property
+from .utils.availability import schedule_rebuild, delete_calendar
+from .utils.summaries import schedule_refresh
+from .utils.trending import record_event, remove_property
+from .utils.authentication import forget_token
+from rest_framework.authtoken.models import Token
+from django.conf import settings
+from django.db import transaction
 import logging
 logger = logging.getLogger(__name__)
 
-def update_cache(instance, instance_key, key, queryset):
-    """Utility to refresh cache for a model"""
-    cache.delete(instance_key)
-    cache.delete(key)
-    cache.set(instance_key, instance)
-    cache.set(key, list(queryset))
-
-def delete_cache(instance_key, key, queryset):
-    """Utility to delete cache for a model"""
-    cache.delete(instance_key)
-    cache.delete(key)
-    cache.set(key, list(queryset))
-    
 @receiver(post_save, sender=User)
 def update_user_cache(sender, instance, **kwargs):
     """Update user cache on save"""
     if instance.is_active:
-        update_cache(
-        instance=instance,
-        instance_key=f"user_profile_{instance.user_id}",
-        key="users",
-        queryset=User.objects.filter(is_active=True, verified=True)
-        )
-        logging.error(f"Cache updated for user_profile, and all users.")
+        set_entity(f"user_profile_{instance.user_id}", instance)
+    else:
+        delete_entity(f"user_profile_{instance.user_id}")
+    if instance.is_active and instance.verified:
+        index_add("users_index", instance.user_id, instance.created_at)
+    else:
+        index_remove("users_index", instance.user_id)
+    bump_generation("users")
+    # The admin host list embeds each host's user.
+    if Host.objects.filter(host_id=instance.user_id).exists():
+        bump_generation("hosts")
+    logging.error(f"Cache updated for user_profile_{instance.user_id}, and the users index.")
 
 @receiver(post_save, sender=Host)
 def update_host_cache(sender, instance, **kwargs):
     """Update host cache on save"""
-    update_cache(
-        instance=instance,
-        instance_key=f"host_profile_{instance.host}",
-        key="hosts",
-        queryset=Host.objects.all()
-    )
-    logging.error(f"Cache updated for host_profile, and all hosts.")
+    set_entity(f"host_profile_{instance.host_id}", instance)
+    bump_generation("hosts")
+    logging.error(f"Cache updated for host_profile_{instance.host_id}.")
 
 @receiver(post_delete, sender=User)
 def delete_user_cache(sender, instance, **kwargs):
     """Delete user cache on delete"""
-    delete_cache(
-        instance_key=f"user_profile_{instance.user_id}",
-        key="users",
-        queryset=User.objects.filter(is_active=True, verified=True)
-    )
-    logging.error("Deleted cache for user_profile, and updated all users")
+    delete_entity(f"user_profile_{instance.user_id}")
+    index_remove("users_index", instance.user_id)
+    bump_generation("users")
+    logging.error(f"Deleted cache for user_profile_{instance.user_id}, and removed it from the users index.")
+
+@receiver(post_delete, sender=Token)
+def delete_token_cache(sender, instance, **kwargs):
+    """Evict a deleted token (logout, password reset, deactivation) from the auth cache"""
+    forget_token(instance.key)
+    logging.error(f"Deleted auth cache for the token of user {instance.user_id}.")
 
 @receiver(post_delete, sender=Host)
 def delete_host_cache(sender, instance, **kwargs):
     """Delete host cache on delete"""
-    delete_cache(
-        instance_key=f"host_profile_{instance.host}",
-        key="hosts",
-        queryset=Host.objects.all()
-    )
-    logging.error("Deleted cache for host_profile, and updated all hosts")
+    delete_entity(f"host_profile_{instance.host_id}")
+    bump_generation("hosts")
+    logging.error(f"Deleted cache for host_profile_{instance.host_id}.")
 
 @receiver(post_save, sender=Property)
 def update_property_cache(sender, instance, **kwargs):
     """Update property cache on save"""
-    update_cache(
-        instance=instance,
-        instance_key=f"property_{instance.property_id}",
-        key="properties",
-        queryset=Property.objects.filter(verification='verified')
-    )
-    logging.error(f"Cache updated for property_{instance.property_id}, and all properties.")
+    # Only verified properties are ever cached, readers trust a cached property_ entry.
+    if instance.verification == 'verified':
+        set_entity(f"property_{instance.property_id}", instance)
+    else:
+        delete_entity(f"property_{instance.property_id}")
+        remove_property(instance.property_id)
+    sync_property(instance)
+    bump_generation("properties")
+    bump_generation("availability")
+    bump_generation(f"property_{instance.property_id}")
+    logging.error(f"Cache updated for property_{instance.property_id}, search index synced, and moved property pages to a new generation.")
 
 @receiver(post_delete, sender=Property)
 def delete_property_cache(sender, instance, **kwargs):
     """Delete property cache on delete"""
-    delete_cache(
-        instance_key=f"property_{instance.property_id}",
-        key="properties",
-        queryset=Property.objects.filter(status='verified')
-    )
-    logging.error(f"Deleted cache for property_{instance.property_id}, and updated all properties.")
\ No newline at end of file
+    delete_entity(f"property_{instance.property_id}")
+    unindex_property(instance.property_id)
+    delete_calendar(instance.property_id)
+    remove_property(instance.property_id)
+    bump_generation("properties")
+    bump_generation("availability")
+    bump_generation(f"property_{instance.property_id}")
+    logging.error(f"Deleted cache for property_{instance.property_id}, removed it from the search index, and moved property pages to a new generation.")
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def update_availability_cache(sender, instance, **kwargs):
+    """A booking was made, changed or removed, property availability pages, calendar and summaries are outdated"""
+    schedule_rebuild(instance.property_id)
+    schedule_refresh(instance)
+    if kwargs.get('created'):
+        property_id = instance.property_id
+        transaction.on_commit(lambda: record_event(property_id, settings.TRENDING_BOOKING_WEIGHT))
+    bump_generation("availability")
+    logging.error(f"Booking {instance.booking_id} changed, rebuilding the calendar of property_{instance.property_id}, and moved availability pages to a new generation.")
+
+@receiver(post_save, sender=SeasonalRate)
+@receiver(post_delete, sender=SeasonalRate)
+def update_rate_cache(sender, instance, **kwargs):
+    """A seasonal rate changed, availability pages carry stay totals priced with it"""
+    bump_generation("availability")
+    logging.error(f"Seasonal rate {instance.rate_id} changed, moved availability pages to a new generation.")
+
+def refresh_property_rating(property_id):
+    """The rating aggregates moved without a Property save, drop what was cached with the old ones"""
+    def invalidate():
+        delete_entity(f"property_{property_id}")
+        bump_generation("properties")
+        bump_generation("availability")
+        bump_generation(f"property_{property_id}")
+        bump_generation(f"reviews_{property_id}")
+    # Before the commit a concurrent reader would cache the old aggregates again.
+    transaction.on_commit(invalidate)
+
+@receiver(post_save, sender=Review)
+def add_review_rating(sender, instance, created, **kwargs):
+    """Count a new review in the rating aggregates of its property"""
+    if not created:
+        return
+    # F() expressions make the database do the addition, concurrent reviews cannot lose an update.
+    Property.objects.filter(property_id=instance.property_id).update(
+        review_count=F('review_count') + 1, rating_sum=F('rating_sum') + instance.rating)
+    refresh_property_rating(instance.property_id)
+    property_id = instance.property_id
+    transaction.on_commit(lambda: record_event(property_id, settings.TRENDING_REVIEW_WEIGHT))
+    logging.error(f"Review {instance.review_id} added to the rating of property_{instance.property_id}.")
+
+@receiver(post_delete, sender=Review)
+def remove_review_rating(sender, instance, **kwargs):
+    """Take a removed review out of the rating aggregates of its property"""
+    Property.objects.filter(property_id=instance.property_id, review_count__gt=0).update(
+        review_count=F('review_count') - 1, rating_sum=F('rating_sum') - instance.rating)
+    refresh_property_rating(instance.property_id)
+    logging.error(f"Review {instance.review_id} removed from the rating of property_{instance.property_id}.")
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def update_payment_summary(sender, instance, **kwargs):
+    """Payments move the revenue of the month their booking starts in"""
+    try:
+        booking = instance.booking
+    except Booking.DoesNotExist:
+        return
+    schedule_refresh(booking)
+    logging.error(f"Payment {instance.payment_id} changed, refreshing the summaries of property_{booking.property_id}.")
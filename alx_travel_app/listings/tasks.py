@@ -2,6 +2,7 @@ from celery import shared_task
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from django.template.loader import render_to_string
+from .utils.trending import compact
 import os, smtplib, ssl, logging
 
 logger = logging.getLogger(__name__)
@@ -29,4 +30,10 @@ def email_verification(self, subject, email, txt_template_name, verification_url
         logger.error("Error retrying..", exc)
         raise self.retry(exc=exc)
 
-    
+
+@shared_task
+def compact_trending():
+    """Rebase the trending scores on the current time and drop the ones that decayed away"""
+    dropped = compact()
+    logger.info(f"Compacted trending properties, dropped {dropped}")
+    return dropped
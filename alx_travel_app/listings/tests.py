@@ -1,3 +1,272 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .models import User, Host, Property, SeasonalRate, Booking, Review
+from .utils.cache_utils import local_cache
+from datetime import date, timedelta
+from decimal import Decimal
+import base64, itertools, json
 
-# Create your tests here.
+class ApiTestCase(TestCase):
+    """Each test starts from an empty cache and calls the API with a token"""
+
+    phones = itertools.count(1000000000)
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def make_user(self, email, **extra):
+        return User.objects.create_user('Test', 'User', email, str(next(self.phones)), 'password123',
+                                        verified=True, **extra)
+
+    def client_for(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    def make_property(self, owner, **extra):
+        fields = {'name': 'Beach House', 'description': 'A house by the beach.', 'location': 'Lagos',
+                  'pricepernight': Decimal('100.00'), 'verification': 'verified'}
+        fields.update(extra)
+        return Property.objects.create(user=owner, **fields)
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+class PropertyListingTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.host = self.make_user('host@example.com')
+        self.guest = self.client_for(self.make_user('guest@example.com'))
+        self.properties = [self.make_property(self.host, name=f'House {i}') for i in range(5)]
+
+    def test_cursor_walks_every_page_once(self):
+        seen = []
+        response = self.guest.get('/api/property/', {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen += [row['property_id'] for row in page['results']]
+            if not page['next']:
+                break
+            response = self.guest.get('/api/property/', {'page_size': 2, 'cursor': page['next']})
+        newest_first = sorted(self.properties, key=lambda row: (row.created_at, row.property_id), reverse=True)
+        self.assertEqual(seen, [str(row.property_id) for row in newest_first])
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', raw_cursor(['x', 'y']), raw_cursor(['newest', 'x', 'y'])):
+            response = self.guest.get('/api/property/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+class PendingPropertyTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.host = self.make_user('host@example.com')
+        self.guest = self.client_for(self.make_user('guest@example.com'))
+
+    def test_pending_property_is_not_retrieved(self):
+        property = self.make_property(self.host, verification='pending')
+        response = self.guest.get(f'/api/property/{property.property_id}/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_property_moved_back_to_pending_leaves_the_cache(self):
+        property = self.make_property(self.host)
+        self.assertEqual(self.guest.get(f'/api/property/{property.property_id}/').status_code, 200)
+        property.verification = 'pending'
+        property.save()
+        response = self.guest.get(f'/api/property/{property.property_id}/')
+        self.assertEqual(response.status_code, 400)
+
+    def clear_caches(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_calendar_leaves_out_pending_properties(self):
+        verified = self.make_property(self.host)
+        pending = self.make_property(self.host, verification='pending')
+        start = date.today()
+        params = {'ids': [verified.property_id, pending.property_id], 'start': start, 'end': start + timedelta(days=7)}
+        for warm in (True, False):
+            if not warm:
+                self.clear_caches()
+            response = self.guest.get('/api/property/calendar/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.json()['calendars']), [str(verified.property_id)])
+
+    def test_quote_leaves_out_pending_properties(self):
+        verified = self.make_property(self.host)
+        pending = self.make_property(self.host, verification='pending')
+        check_in = date.today() + timedelta(days=7)
+        params = {'ids': [verified.property_id, pending.property_id], 'check_in': check_in,
+                  'check_out': check_in + timedelta(days=2)}
+        for warm in (True, False):
+            if not warm:
+                self.clear_caches()
+            response = self.guest.get('/api/property/quote/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.json()['quotes']), [str(verified.property_id)])
+
+class PricingTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.host = self.make_user('host@example.com')
+        self.guest = self.client_for(self.make_user('guest@example.com'))
+        self.property = self.make_property(self.host, weekendpricepernight=Decimal('150.00'))
+        today = date.today()
+        # A Monday at least a week away, so a seven night stay holds one Friday and one Saturday.
+        self.monday = today + timedelta(days=7 + (7 - today.weekday()) % 7)
+
+    def quote(self, nights):
+        response = self.guest.get('/api/property/quote/', {'ids': [self.property.property_id], 'check_in': self.monday,
+                                                           'check_out': self.monday + timedelta(days=nights)})
+        self.assertEqual(response.status_code, 200)
+        return Decimal(response.json()['quotes'][str(self.property.property_id)])
+
+    def test_weekend_nights_use_the_weekend_rate(self):
+        self.assertEqual(self.quote(4), Decimal('400.00'))
+        self.assertEqual(self.quote(7), Decimal('800.00'))
+
+    def test_seasonal_rate_overrides_the_nights_it_covers(self):
+        # Tuesday and Wednesday nights at 200, then Saturday night at 50 instead of the weekend rate.
+        SeasonalRate.objects.create(property=self.property, start_date=self.monday + timedelta(days=1),
+                                    end_date=self.monday + timedelta(days=3), pricepernight=Decimal('200.00'))
+        SeasonalRate.objects.create(property=self.property, start_date=self.monday + timedelta(days=5),
+                                    end_date=self.monday + timedelta(days=6), pricepernight=Decimal('50.00'))
+        self.assertEqual(self.quote(7), Decimal('900.00'))
+
+class BookingOverlapTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.property = self.make_property(self.make_user('host@example.com'))
+        self.guest = self.client_for(self.make_user('guest@example.com'))
+        self.other = self.client_for(self.make_user('other@example.com'))
+        self.start = date.today() + timedelta(days=30)
+
+    def book(self, client, first_night, nights):
+        start = self.start + timedelta(days=first_night)
+        return client.post(f'/api/booking/{self.property.property_id}/',
+                           {'start_date': start, 'end_date': start + timedelta(days=nights)}, format='json')
+
+    def test_overlapping_booking_is_a_conflict(self):
+        self.assertEqual(self.book(self.guest, 0, 3).status_code, 200)
+        self.assertEqual(self.book(self.other, 2, 3).status_code, 409)
+
+    def test_back_to_back_bookings_do_not_overlap(self):
+        self.assertEqual(self.book(self.guest, 0, 3).status_code, 200)
+        self.assertEqual(self.book(self.other, 3, 2).status_code, 200)
+
+class ReviewTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.property = self.make_property(self.make_user('host@example.com'))
+        self.url = f'/api/property/{self.property.property_id}/reviews/'
+
+    def booked_guest(self, email):
+        user = self.make_user(email)
+        start = date.today() + timedelta(days=30)
+        Booking.objects.create(property=self.property, user=user, start_date=start,
+                               end_date=start + timedelta(days=2), total_price=Decimal('200.00'))
+        return self.client_for(user)
+
+    def review(self, client, rating):
+        # The rating cache is only invalidated once the review is committed.
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(self.url, {'rating': rating, 'comment': 'Lovely stay.'}, format='json')
+
+    def cached_property(self, client):
+        return client.get(f'/api/property/{self.property.property_id}/').json()
+
+    def test_second_review_of_the_same_property_is_rejected(self):
+        guest = self.booked_guest('guest@example.com')
+        self.assertEqual(self.review(guest, 4).status_code, 201)
+        self.assertEqual(self.review(guest, 5).status_code, 400)
+        self.assertEqual(Review.objects.filter(property=self.property).count(), 1)
+
+    def test_rating_aggregates_follow_reviews(self):
+        guest, other = self.booked_guest('guest@example.com'), self.booked_guest('other@example.com')
+        self.assertEqual(self.cached_property(guest)['review_count'], 0)
+        self.review(guest, 5)
+        self.review(other, 2)
+        data = self.cached_property(guest)
+        self.assertEqual((data['review_count'], data['average_rating']), (2, 3.5))
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.get(property=self.property, rating=2).delete()
+        data = self.cached_property(guest)
+        self.assertEqual((data['review_count'], data['average_rating']), (1, 5.0))
+
+    def test_pending_property_cannot_be_reviewed(self):
+        guest = self.booked_guest('guest@example.com')
+        self.property.verification = 'pending'
+        self.property.save()
+        self.assertEqual(self.review(guest, 4).status_code, 400)
+
+class HostBookingsTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        host = self.make_user('host@example.com', role='host')
+        Host.objects.create(host=host, bio='Host of beach houses.', address='Lagos', identity='A1234567')
+        self.host = self.client_for(host)
+        property = self.make_property(host)
+        guest = self.make_user('guest@example.com')
+        start = date.today() + timedelta(days=30)
+        # Two bookings share each start date, the cursor has to break the tie on booking_id.
+        self.bookings = [Booking.objects.create(property=property, user=guest, start_date=start + timedelta(days=i // 2),
+                                                end_date=start + timedelta(days=i // 2 + 1), total_price=Decimal('100.00'))
+                         for i in range(5)]
+
+    def walk(self, sort):
+        seen = []
+        params = {'sort': sort, 'page_size': 2}
+        while True:
+            response = self.host.get('/api/host/bookings/', params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen += [row['booking_id'] for row in page['results']]
+            if not page['next']:
+                return seen
+            params['cursor'] = page['next']
+
+    def test_cursor_walks_every_booking_once(self):
+        ascending = sorted(self.bookings, key=lambda row: (row.start_date, row.booking_id))
+        self.assertEqual(self.walk('start_asc'), [str(row.booking_id) for row in ascending])
+        self.assertEqual(self.walk('start_desc'), [str(row.booking_id) for row in reversed(ascending)])
+
+    def test_bad_cursor_is_rejected(self):
+        first_page = self.host.get('/api/host/bookings/', {'sort': 'start_asc', 'page_size': 2}).json()
+        for sort, cursor in (('start_asc', 'not-a-cursor'), ('start_asc', raw_cursor(['start_date', 'x', 'y'])),
+                             ('start_desc', first_page['next'])):
+            response = self.host.get('/api/host/bookings/', {'sort': sort, 'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+class ProfileUpdateTests(ApiTestCase):
+
+    def test_profile_update_keeps_changes_made_after_the_user_was_cached(self):
+        user = self.make_user('guest@example.com')
+        client = self.client_for(user)
+        self.assertEqual(client.get('/api/profile/').status_code, 200)
+        # Bypasses the signals, so the authenticated user stays cached as a guest.
+        User.objects.filter(user_id=user.user_id).update(role='host')
+        response = client.patch('/api/profile/', {'phone_number': '5550001111'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual((user.phone_number, user.role), ('5550001111', 'host'))
+
+class AdminHostListTests(ApiTestCase):
+
+    def test_host_list_follows_user_changes(self):
+        admin = self.client_for(self.make_user('admin@example.com', role='admin', is_superuser=True, is_staff=True))
+        user = self.make_user('host@example.com', role='host')
+        Host.objects.create(host=user, bio='Host of beach houses.', address='Lagos', identity='A1234567')
+        self.assertEqual(admin.get('/api/host/').json()[0]['user']['first_name'], 'Test')
+        user.first_name = 'Renamed'
+        user.save()
+        self.assertEqual(admin.get('/api/host/').json()[0]['user']['first_name'], 'Renamed')
@@ -1,6 +1,6 @@
 from django.urls import path
 from .auth_views import UserApiView, Verify_signup_token, ModifyUserViewset, LoginApiView, UserProfileViewset, VerifyEmailUpdate, ResetPassword, VerifyPasswordReset, SetPasswordView, Change_passwordView, VerifyAcctDeactivation, LogoutView
-from .views import HostViewset, PropertyViewset, BookingViewset, ModifyHostViewset, PaymentViewset
+from .views import HostViewset, PropertyViewset, ReviewViewset, BookingViewset, ModifyHostViewset, PaymentViewset, CacheMetricsView, HostDashboardView, HostBookingsView
 
 urlpatterns = [
     path('register/', UserApiView.as_view(), name='register'),
@@ -22,12 +22,24 @@ urlpatterns = [
     path('host/', ModifyHostViewset.as_view({'get': 'list'}), name='host'),
     path('host/<uuid:uuid>/', ModifyHostViewset.as_view({'get': 'retrieve', 'patch': 'update', 'put': 'update'}), name='host'),
 
+    path('host/dashboard/', HostDashboardView.as_view(), name='host_dashboard'),
+    path('host/bookings/', HostBookingsView.as_view(), name='host_bookings'),
+
     path('host_profile/', HostViewset.as_view({'post': 'create','get': 'retrieve', 'patch': 'update', 'put': 'update'}), name='host_profile'),
 
     path('property/', PropertyViewset.as_view({'post': 'create', 'get': 'list'}), name='property'),
+    path('property/available/', PropertyViewset.as_view({'get': 'available'}), name='property_available'),
+    path('property/calendar/', PropertyViewset.as_view({'get': 'calendar'}), name='property_calendar'),
+    path('property/quote/', PropertyViewset.as_view({'get': 'quote'}), name='property_quote'),
+    path('property/trending/', PropertyViewset.as_view({'get': 'trending'}), name='property_trending'),
+    path('property/search/', PropertyViewset.as_view({'get': 'search'}), name='property_search'),
     path('property/<uuid:uuid>/', PropertyViewset.as_view({'get': 'retrieve', 'patch': 'update', 'put': 'update', 'delete': 'destroy'})),
+    path('property/<uuid:uuid>/rates/', PropertyViewset.as_view({'get': 'rates', 'post': 'rates'}), name='property_rates'),
+    path('property/<uuid:uuid>/reviews/', ReviewViewset.as_view({'get': 'list', 'post': 'create'}), name='property_reviews'),
     path('booking/', BookingViewset.as_view({'get': 'list'}), name='booking'),
     path('booking/<uuid:uuid>/', BookingViewset.as_view({'post': 'create', 'patch': 'update', 'put': 'update'}), name='booking'),
 
     path('payment/<uuid:uuid>/', PaymentViewset.as_view(), name='payment'),
+
+    path('cache_metrics/', CacheMetricsView.as_view(), name='cache_metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from .cache_utils import local_cache, get_entity, fill_entity, delete_entity, cache_ttl, start_invalidation_listener, get_redis
+from .metrics import metrics
+import hashlib, time
+
+def token_cache_key(key):
+    # Only a digest of the token goes into Redis key names, never the credential itself.
+    return f"auth_token_{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+
+def forget_token(key):
+    """Drop a token from every worker, called when its row is deleted"""
+    delete_entity(token_cache_key(key))
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication resolving token -> user id -> user from the in-process LRU
+    and Redis, so a warm request does no database work to authenticate. Only a
+    miss runs DRF's Token + User join, and fills both tiers. Token rows deleted on
+    logout, password reset or deactivation evict the mapping through a signal.
+    """
+
+    def authenticate_credentials(self, key):
+        start_invalidation_listener(local_cache, get_redis)
+        cache_key = token_cache_key(key)
+        user_id = local_cache.get(cache_key)
+        if user_id is not None:
+            metrics.hit("auth_token", local=True)
+        else:
+            user_id = cache.get(cache_key)
+            if user_id is not None:
+                local_cache.set(cache_key, user_id)
+                metrics.hit("auth_token")
+        if user_id is not None:
+            user = get_entity(f"user_profile_{user_id}")
+            # user_profile entries only exist for active users, a miss falls through to the database.
+            if user is not None and user.is_active:
+                return (user, key)
+
+        metrics.miss("auth_token")
+        started = time.monotonic()
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
+        if not token.user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        user_id = str(token.user.user_id)
+        cache.set(cache_key, user_id, cache_ttl("auth_token"))
+        local_cache.set(cache_key, user_id)
+        fill_entity(f"user_profile_{user_id}", token.user)
+        metrics.fill("auth_token", time.monotonic() - started, len(user_id))
+        return (token.user, key)
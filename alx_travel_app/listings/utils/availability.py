@@ -0,0 +1,71 @@
+from django.db import transaction
+from listings.models import Booking
+from .cache_utils import get_redis, cache_ttl
+from datetime import date
+import numpy as np
+
+# Bit n of a property calendar is the night of EPOCH + n days, set when it is booked.
+# Redis numbers bits from the most significant bit of the first byte, like
+# numpy's packbits/unpackbits with the default big bit order.
+EPOCH = date(2020, 1, 1)
+
+def calendar_key(property_id):
+    return f"calendar_{property_id}"
+
+def day_index(day):
+    return (day - EPOCH).days
+
+def _bitmap(bookings):
+    """Pack the booked nights of (start_date, end_date) pairs into a calendar bitmap"""
+    bookings = list(bookings)
+    if not bookings:
+        return b""
+    nights = np.zeros(max(day_index(end_date) for _, end_date in bookings), dtype=np.uint8)
+    for start_date, end_date in bookings:
+        nights[max(day_index(start_date), 0):day_index(end_date)] = 1
+    return np.packbits(nights).tobytes()
+
+def _live_bookings(property_ids):
+    bookings = {property_id: [] for property_id in property_ids}
+    rows = (Booking.objects.filter(property_id__in=property_ids, end_date__gt=EPOCH).exclude(status='canceled')
+            .values_list('property_id', 'start_date', 'end_date'))
+    for property_id, start_date, end_date in rows:
+        bookings[property_id].append((start_date, end_date))
+    return bookings
+
+def rebuild_calendars(property_ids):
+    """Recompute calendars from the live bookings, one query and one pipeline for all of them"""
+    bitmaps = {property_id: _bitmap(bookings) for property_id, bookings in _live_bookings(property_ids).items()}
+    pipe = get_redis().pipeline(transaction=False)
+    for property_id, bitmap in bitmaps.items():
+        # The whole bitmap is replaced in one SET, readers never see it half updated.
+        pipe.set(calendar_key(property_id), bitmap, ex=cache_ttl("calendar"))
+    pipe.execute()
+    return bitmaps
+
+def schedule_rebuild(property_id):
+    """Rebuild a property calendar once the booking change that triggered it is committed"""
+    transaction.on_commit(lambda: rebuild_calendars([property_id]))
+
+def delete_calendar(property_id):
+    get_redis().delete(calendar_key(property_id))
+
+def load_calendars(property_ids, start_date, end_date):
+    """
+    Booked flags of every night in [start_date, end_date) for many properties,
+    as a (properties, nights) uint8 matrix in the order of property_ids.
+    The bitmaps come from one MGET, missing ones are rebuilt from the database,
+    and the window is cut out of all of them in one vectorized unpack.
+    """
+    bitmaps = dict(zip(property_ids, get_redis().mget([calendar_key(property_id) for property_id in property_ids])))
+    missing = [property_id for property_id, bitmap in bitmaps.items() if bitmap is None]
+    if missing:
+        bitmaps.update(rebuild_calendars(missing))
+
+    first, last = day_index(start_date), day_index(end_date)
+    width = (last + 7) // 8
+    packed = np.zeros((len(property_ids), width), dtype=np.uint8)
+    for row, property_id in enumerate(property_ids):
+        bitmap = np.frombuffer(bitmaps[property_id][:width], dtype=np.uint8)
+        packed[row, :len(bitmap)] = bitmap
+    return np.unpackbits(packed, axis=1)[:, first:last]
@@ -0,0 +1,240 @@
+from django.conf import settings
+from django.core.cache import cache
+from .local_cache import LocalCache, start_invalidation_listener, publish_invalidation
+from .codec import encode, decode, model_for_key
+from .metrics import metrics
+import redis, time
+
+_redis_client = None
+
+local_cache = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TTL)
+
+def get_redis():
+    """Raw redis client for structures the Django cache API cannot express (sorted sets, pub/sub)"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.CACHES["default"]["LOCATION"])
+    return _redis_client
+
+# Key prefixes of each family in CACHE_TTLS, generation and lock keys are matched first.
+KEY_FAMILIES = (
+    ("user_profile_", "user_profile"),
+    ("host_profile_", "host_profile"),
+    ("property_", "property"),
+    ("response_", "list"),
+    ("users_index", "list"),
+    ("rt_", "rate_limit"),
+    ("calendar_", "calendar"),
+    ("auth_token_", "auth_token"),
+)
+
+def family_for_key(key):
+    if key.endswith("_generation"):
+        return "generation"
+    if key.startswith("lock_"):
+        return "lock"
+    for prefix, family in KEY_FAMILIES:
+        if key.startswith(prefix):
+            return family
+    return "other"
+
+def cache_ttl(family):
+    """Time to live of a key family, from CACHE_TTLS"""
+    return settings.CACHE_TTLS[family]
+
+def get_entity(key):
+    """Read a cached entity from the in-process LRU first, then from Redis"""
+    start_invalidation_listener(local_cache, get_redis)
+    family = family_for_key(key)
+    payload = local_cache.get(key)
+    if payload is None:
+        payload = cache.get(key)
+        if payload is None:
+            metrics.miss(family)
+            return None
+        local_cache.set(key, payload)
+        metrics.hit(family)
+    else:
+        metrics.hit(family, local=True)
+    # Every read decodes a fresh instance, callers may mutate and save it.
+    return decode(model_for_key(key), payload)
+
+def fill_entity(key, instance, started=None):
+    """Cache an entity just loaded from the database in both tiers, started is when the miss began"""
+    family = family_for_key(key)
+    payload = encode(instance)
+    cache.set(key, payload, cache_ttl(family))
+    local_cache.set(key, payload)
+    if started is not None:
+        metrics.fill(family, time.monotonic() - started, len(payload))
+
+def set_entity(key, instance):
+    """Store a changed entity and evict it from every worker's LRU"""
+    family = family_for_key(key)
+    payload = encode(instance)
+    cache.set(key, payload, cache_ttl(family))
+    publish_invalidation(local_cache, get_redis(), key)
+    metrics.write(family, len(payload))
+
+def get_entities(keys):
+    """Batch get_entity: LRU first, then one get_many for the rest, returns {key: instance}"""
+    start_invalidation_listener(local_cache, get_redis)
+    payloads = {}
+    remote = []
+    for key in keys:
+        payload = local_cache.get(key)
+        if payload is None:
+            remote.append(key)
+        else:
+            payloads[key] = payload
+            metrics.hit(family_for_key(key), local=True)
+    if remote:
+        found = cache.get_many(remote)
+        for key in remote:
+            if key in found:
+                local_cache.set(key, found[key])
+                payloads[key] = found[key]
+                metrics.hit(family_for_key(key))
+            else:
+                metrics.miss(family_for_key(key))
+    entities = {}
+    for key, payload in payloads.items():
+        instance = decode(model_for_key(key), payload)
+        if instance is not None:
+            entities[key] = instance
+    return entities
+
+def fill_entities(instances, started=None):
+    """Batch fill_entity with one set_many, instances is {key: instance}"""
+    by_family = {}
+    for key, instance in instances.items():
+        by_family.setdefault(family_for_key(key), {})[key] = encode(instance)
+    for family, payloads in by_family.items():
+        cache.set_many(payloads, cache_ttl(family))
+        for key, payload in payloads.items():
+            local_cache.set(key, payload)
+        if started is not None:
+            metrics.fill(family, time.monotonic() - started, sum(map(len, payloads.values())), len(payloads))
+
+def load_entities(ids, key_prefix, queryset, id_field):
+    """
+    Resolve many ids to instances in two round trips: one get_many for the cached
+    ones and, for the misses, one __in query followed by one set_many.
+    Returns {str(id): instance}. Only misses are checked against the queryset, so
+    key_prefix entries must only ever be cached for instances it matches.
+    """
+    ids = [str(member_id) for member_id in ids]
+    cached = get_entities([f"{key_prefix}{member_id}" for member_id in ids])
+    found = {member_id: cached[f"{key_prefix}{member_id}"] for member_id in ids if f"{key_prefix}{member_id}" in cached}
+    missing = [member_id for member_id in ids if member_id not in found]
+    if missing:
+        started = time.monotonic()
+        loaded = {str(getattr(instance, id_field)): instance
+                  for instance in queryset.filter(**{f"{id_field}__in": missing})}
+        if loaded:
+            fill_entities({f"{key_prefix}{member_id}": instance for member_id, instance in loaded.items()}, started)
+        found.update(loaded)
+    return found
+
+def delete_entity(key):
+    cache.delete(key)
+    publish_invalidation(local_cache, get_redis(), key)
+    metrics.evict(family_for_key(key))
+
+def single_flight(name):
+    """Redis lock making one worker the only one rebuilding name, None if another holds it"""
+    lock = get_redis().lock(f"lock_{name}", timeout=settings.CACHE_LOCK_TIMEOUT)
+    if lock.acquire(blocking=False):
+        return lock
+    return None
+
+def release(lock):
+    try:
+        lock.release()
+    except redis.exceptions.LockError:
+        # The lock expired while rebuilding, another worker may already own it.
+        pass
+
+def wait_for(check):
+    """Poll check() for up to CACHE_LOCK_WAIT seconds, return its first truthy result"""
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        result = check()
+        if result:
+            return result
+        time.sleep(0.05)
+    return None
+
+def generation_key(family):
+    return f"{family}_generation"
+
+def get_generation(family):
+    """Current generation of a cached family, bumped on every change to it"""
+    return cache.get(generation_key(family), 0)
+
+def bump_generation(family):
+    """
+    Invalidate every cached page of a family at once by moving to a new generation.
+    Generations are unique timestamps rather than counters, so one can expire
+    without a later generation ever matching entries written before it. The key
+    outlives every entry written while it was absent (generation 0).
+    """
+    generation = time.time_ns()
+    cache.set(generation_key(family), generation, cache_ttl("list") + settings.CACHE_STALE_TTL)
+    return generation
+
+def index_add(index, member_id, created_at):
+    """Add or move one id in an ordered id index, scored by its creation time"""
+    get_redis().zadd(index, {str(member_id): created_at.timestamp()})
+
+def index_remove(index, member_id):
+    get_redis().zrem(index, str(member_id))
+
+def index_add_many(pipe, index, instances, id_field):
+    """Queue one ZADD adding a chunk of instances to an ordered id index"""
+    members = {str(getattr(instance, id_field)): instance.created_at.timestamp() for instance in instances}
+    if members:
+        pipe.zadd(index, members)
+
+def mark_index_ready(pipe, index):
+    # The index outlives its ready marker, readers never see it vanish before a rebuild.
+    pipe.expire(index, cache_ttl("list") + settings.CACHE_STALE_TTL)
+    pipe.set(f"{index}_ready", 1, ex=cache_ttl("list"))
+
+def build_index(index, queryset, id_field, chunk_size=2000):
+    """(Re)fill an ordered id index from the database, on a cold cache or once its TTL ran out"""
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.delete(index)
+    chunk = []
+    for instance in queryset.only(id_field, "created_at").iterator(chunk_size=chunk_size):
+        chunk.append(instance)
+        if len(chunk) == chunk_size:
+            index_add_many(pipe, index, chunk, id_field)
+            pipe.execute()
+            chunk = []
+    index_add_many(pipe, index, chunk, id_field)
+    mark_index_ready(pipe, index)
+    pipe.execute()
+
+def load_index(index, queryset, key_prefix, id_field):
+    """
+    Return the instances of an ordered id index, oldest first.
+    Instances are read from their per-entity keys in one round trip and only
+    the misses are loaded from the database, with one query.
+    """
+    client = get_redis()
+    if not client.exists(f"{index}_ready"):
+        lock = single_flight(index)
+        if lock is not None:
+            try:
+                build_index(index, queryset, id_field)
+            finally:
+                release(lock)
+        elif not wait_for(lambda: client.exists(f"{index}_ready")):
+            build_index(index, queryset, id_field)
+    ids = [member.decode() for member in client.zrange(index, 0, -1)]
+    found = load_entities(ids, key_prefix, queryset, id_field)
+    stale = [member_id for member_id in ids if member_id not in found]
+    if stale:
+        client.zrem(index, *stale)
+    return [found[member_id] for member_id in ids if member_id in found]
@@ -0,0 +1,66 @@
+from listings.models import User, Host, Property
+import msgpack, datetime, decimal, functools, uuid, zlib
+
+# Bump when the encoding itself changes, model field changes are detected on their own.
+SCHEMA_VERSION = 1
+
+KEY_MODELS = (
+    ("user_profile_", User),
+    ("host_profile_", Host),
+    ("property_", Property),
+)
+
+UUID_EXT, DATETIME_EXT, DATE_EXT, DECIMAL_EXT = 1, 2, 3, 4
+
+def model_for_key(key):
+    for prefix, model in KEY_MODELS:
+        if key.startswith(prefix):
+            return model
+    raise ValueError(f"No cached model for key {key}")
+
+@functools.cache
+def field_names(model):
+    return tuple(field.attname for field in model._meta.concrete_fields)
+
+@functools.cache
+def fingerprint(model):
+    """Changes whenever a concrete field is added, removed or reordered"""
+    return zlib.crc32(",".join(field_names(model)).encode())
+
+def _default(value):
+    if isinstance(value, uuid.UUID):
+        return msgpack.ExtType(UUID_EXT, value.bytes)
+    if isinstance(value, datetime.datetime):
+        return msgpack.ExtType(DATETIME_EXT, value.isoformat().encode())
+    if isinstance(value, datetime.date):
+        return msgpack.ExtType(DATE_EXT, value.isoformat().encode())
+    if isinstance(value, decimal.Decimal):
+        return msgpack.ExtType(DECIMAL_EXT, str(value).encode())
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+def _ext_hook(code, data):
+    if code == UUID_EXT:
+        return uuid.UUID(bytes=data)
+    if code == DATETIME_EXT:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == DATE_EXT:
+        return datetime.date.fromisoformat(data.decode())
+    if code == DECIMAL_EXT:
+        return decimal.Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+def encode(instance):
+    """Pack the concrete field values of an instance as a versioned msgpack tuple"""
+    model = type(instance)
+    values = [getattr(instance, name) for name in field_names(model)]
+    return msgpack.packb([SCHEMA_VERSION, fingerprint(model), values], default=_default, use_bin_type=True)
+
+def decode(model, payload):
+    """Rebuild an instance from its payload, None if it was written for another schema"""
+    try:
+        version, model_fingerprint, values = msgpack.unpackb(payload, ext_hook=_ext_hook, raw=False)
+    except (ValueError, TypeError, msgpack.UnpackException):
+        return None
+    if version != SCHEMA_VERSION or model_fingerprint != fingerprint(model):
+        return None
+    return model.from_db("default", field_names(model), values)
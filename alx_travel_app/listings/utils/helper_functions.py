@@ -1,7 +1,9 @@
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.cache import cache
 from listings.models import User, Host, Property, Booking
+from .cache_utils import get_entity, get_entities, fill_entity, fill_entities
+from django.db import transaction
+import time
 
 def check_if_is_admin(admin):
     if admin.verified and admin.is_superuser and admin.is_active:
@@ -12,11 +14,12 @@ def check_if_is_admin(admin):
         return False
 
 def check_single_user_in_cache_db(user_id):
-    user = cache.get(f"user_profile_{user_id}")
+    user = get_entity(f"user_profile_{user_id}")
     if user is None:
+        started = time.monotonic()
         try:
             instance = User.objects.get(user_id=user_id, verified=True, is_active=True)
-            cache.set(f"user_profile_{user_id}", instance)
+            fill_entity(f"user_profile_{user_id}", instance, started)
             user = instance
             return user
         except User.DoesNotExist:
@@ -24,25 +27,47 @@ def check_single_user_in_cache_db(user_id):
     return user
 
 def check_if_user_is_a_host(user_id):
-    user = check_single_user_in_cache_db(user_id)
-    if not user:
+    """
+    Host profile of an active user, with the user attached. Both entities are read
+    in one round trip, a miss costs one query joining the host to its user.
+    """
+    user_key, host_key = f"user_profile_{user_id}", f"host_profile_{user_id}"
+    found = get_entities([user_key, host_key])
+    if user_key in found and host_key in found:
+        host = found[host_key]
+        host.host = found[user_key]
+        return host
+    started = time.monotonic()
+    try:
+        host = Host.objects.select_related('host').get(host_id=user_id, host__verified=True, host__is_active=True)
+    except Host.DoesNotExist:
         return False
+    fill_entities({user_key: host.host, host_key: host}, started)
+    return host
+
+def get_host_profile(user):
+    """Host profile of an already checked user, with the user attached, False when there is none"""
     try:
-        host_cached = cache.get(f"host_profile_{user.user_id}")
+        host_cached = get_entity(f"host_profile_{user.user_id}")
         if host_cached is None:
-            host = Host.objects.get(host=user.user_id)
-            cache.set(f"host_profile_{user.user_id}", host)
+            started = time.monotonic()
+            host = Host.objects.get(host_id=user.user_id)
+            fill_entity(f"host_profile_{user.user_id}", host, started)
             host_cached = host
     except Host.DoesNotExist:
         return False
+    host_cached.host = user
     return host_cached
 
 def check_if_property_in_cache_db(property_id):
-    property = cache.get(f"property_{property_id}")
+    property = get_entity(f"property_{property_id}")
+    if property is not None and property.verification != 'verified':
+        return False
     if property is None:
+        started = time.monotonic()
         try:
-            property_instance = Property.objects.get(property_id=property_id, status='verified')
-            cache.set(f"property_{property_id}", property_instance)
+            property_instance = Property.objects.get(property_id=property_id, verification='verified')
+            fill_entity(f"property_{property_id}", property_instance, started)
             property = property_instance
             return property
         except Property.DoesNotExist:
@@ -56,6 +81,26 @@ def check_if_user_has_booked(user_id, booking_id):
         return False
     return booking
 
+def overlapping_bookings(property, start_date, end_date):
+    """Live bookings of a property (or OuterRef) sharing a night with [start_date, end_date)"""
+    # Matches the booking_interval_idx condition so the lookup is one index range scan.
+    return Booking.objects.filter(property=property, start_date__lt=end_date,
+                                  end_date__gt=start_date).exclude(status='canceled')
+
+def create_booking(property, user, start_date, end_date, total_price):
+    """
+    Insert a booking unless it overlaps a live one, None if it does.
+    The property row stays locked from the overlap check to the insert, so
+    concurrent requests for the same property run one after the other and
+    two of them can never both book the same nights.
+    """
+    with transaction.atomic():
+        list(Property.objects.select_for_update().filter(property_id=property.property_id).values_list('pk'))
+        if overlapping_bookings(property, start_date, end_date).exists():
+            return None
+        return Booking.objects.create(property=property, user=user, start_date=start_date,
+                                      end_date=end_date, total_price=total_price)
+
 # Get the Client Ip address
 def get_client_ip(request):
     address = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -0,0 +1,103 @@
+from django.conf import settings
+from cryptography.hazmat.primitives import serialization
+from jwt.algorithms import get_default_algorithms
+import hashlib, os, threading, time, logging
+
+logger = logging.getLogger(__name__)
+
+def key_id(public_key):
+    """Stable id of a public key, the start of the SHA-256 of its DER encoding"""
+    der = public_key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return hashlib.sha256(der).hexdigest()[:16]
+
+class KeyProvider:
+    """
+    Parsed JWT keys, loaded once per process. The key files are only stat()ed,
+    at most every JWT_KEY_CHECK_INTERVAL seconds, and re-read when one of them
+    changed. Verification accepts the public half of the signing key and every
+    retired public key still in JWT_RETIRED_KEYS_DIR, so tokens signed before a
+    rotation stay valid.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._checked_at = 0.0
+        self._forced_at = None
+        # (kid, signing key, {kid: verification key}), swapped as a whole on reload.
+        self._keys = None
+
+    def _files(self):
+        files = [settings.JWT_PRIVATE_KEY_PATH]
+        retired = settings.JWT_RETIRED_KEYS_DIR
+        if os.path.isdir(retired):
+            files += sorted(os.path.join(retired, name) for name in os.listdir(retired) if name.endswith(".pem"))
+        return files
+
+    def _snapshot(self):
+        private_key, *retired = self._files()
+        mtimes = {private_key: os.stat(private_key).st_mtime_ns}
+        for path in retired:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue  # pruned since it was listed
+        return mtimes
+
+    def _load(self, mtimes):
+        algorithm = get_default_algorithms()[settings.JWT_ALGORITHM]
+        with open(settings.JWT_PRIVATE_KEY_PATH, "rb") as file:
+            signing_key = algorithm.prepare_key(file.read())
+        # The kid comes from the private key itself, so it always matches the signature.
+        kid = key_id(signing_key.public_key())
+        verification_keys = {kid: signing_key.public_key()}
+        # The snapshot lists the private key first, then the retired public keys.
+        for path in list(mtimes)[1:]:
+            try:
+                with open(path, "rb") as file:
+                    public_key = algorithm.prepare_key(file.read())
+            except FileNotFoundError:
+                continue  # pruned since the snapshot
+            verification_keys.setdefault(key_id(public_key), public_key)
+        self._keys = (kid, signing_key, verification_keys)
+        self._mtimes = mtimes
+        logger.info(f"Loaded JWT signing key {kid} and {len(verification_keys)} verification keys")
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._mtimes is not None and now - self._checked_at < settings.JWT_KEY_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if not force and self._mtimes is not None and now - self._checked_at < settings.JWT_KEY_CHECK_INTERVAL:
+                return
+            mtimes = self._snapshot()
+            if force or mtimes != self._mtimes:
+                self._load(mtimes)
+            self._checked_at = now
+
+    def reload(self):
+        """Re-read the key files now, e.g. right after a rotation in this process"""
+        self._refresh(force=True)
+
+    def signing_key(self):
+        """(kid, private key) to sign new tokens with"""
+        self._refresh()
+        kid, signing_key, _ = self._keys
+        return kid, signing_key
+
+    def verification_key(self, kid):
+        """Public key for a token header kid, the current one for tokens without a kid, None if unknown"""
+        self._refresh()
+        current_kid, _, verification_keys = self._keys
+        key = verification_keys.get(current_kid if kid is None else kid)
+        if key is None and kid is not None:
+            # Another worker may have rotated the keys since the last check. Reloading
+            # at most once per interval keeps made-up kids from forcing a read every request.
+            now = time.monotonic()
+            if self._forced_at is None or now - self._forced_at >= settings.JWT_KEY_CHECK_INTERVAL:
+                self._forced_at = now
+                self._refresh(force=True)
+                key = self._keys[2].get(kid)
+        return key
+
+key_provider = KeyProvider()
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+import threading, time, os, logging
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+class LocalCache:
+    """Bounded per-process LRU with a short TTL, kept in front of Redis"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+def _listen(local, get_client):
+    """Drop local entries whenever another worker publishes an invalidation"""
+    while True:
+        try:
+            pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything published while we were not subscribed is lost, start clean.
+            local.clear()
+            for message in pubsub.listen():
+                if message["type"] == "message":
+                    local.delete(message["data"].decode())
+        except Exception as exc:
+            logger.error(f"Cache invalidation listener failed, retrying: {exc}")
+            local.clear()
+            time.sleep(1)
+
+def start_invalidation_listener(local, get_client):
+    """Start the subscriber thread once per process (again after a fork)"""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        local.clear()
+        thread = threading.Thread(target=_listen, args=(local, get_client), daemon=True,
+                                  name="cache-invalidation-listener")
+        thread.start()
+        _listener_pid = os.getpid()
+
+def publish_invalidation(local, client, key):
+    """Drop a key locally and tell every other worker to drop it as well"""
+    local.delete(key)
+    client.publish(INVALIDATION_CHANNEL, key)
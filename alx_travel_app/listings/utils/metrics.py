@@ -0,0 +1,65 @@
+import threading
+
+class CacheMetrics:
+    """In-process hit/miss, fill latency and payload size counters per cache key family"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}
+
+    def _counters(self, family):
+        return self._families.setdefault(family, {
+            "local_hits": 0, "hits": 0, "stale_hits": 0, "misses": 0,
+            "fills": 0, "fill_seconds": 0.0, "fill_bytes": 0,
+            "writes": 0, "write_bytes": 0, "evictions": 0,
+        })
+
+    def hit(self, family, local=False, stale=False, count=1):
+        with self._lock:
+            counters = self._counters(family)
+            if local:
+                counters["local_hits"] += count
+            elif stale:
+                counters["stale_hits"] += count
+            else:
+                counters["hits"] += count
+
+    def miss(self, family, count=1):
+        with self._lock:
+            self._counters(family)["misses"] += count
+
+    def fill(self, family, seconds, size, count=1):
+        """A miss was loaded from the database (or rebuilt) and written back"""
+        with self._lock:
+            counters = self._counters(family)
+            counters["fills"] += count
+            counters["fill_seconds"] += seconds
+            counters["fill_bytes"] += size
+
+    def write(self, family, size):
+        """A signal handler wrote a changed entity"""
+        with self._lock:
+            counters = self._counters(family)
+            counters["writes"] += 1
+            counters["write_bytes"] += size
+
+    def evict(self, family):
+        with self._lock:
+            self._counters(family)["evictions"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            families = {family: dict(counters) for family, counters in self._families.items()}
+        for counters in families.values():
+            reads = counters["local_hits"] + counters["hits"] + counters["stale_hits"] + counters["misses"]
+            fills = counters["fills"]
+            counters["hit_ratio"] = round((reads - counters["misses"]) / reads, 4) if reads else None
+            counters["avg_fill_ms"] = round(1000 * counters["fill_seconds"] / fills, 3) if fills else None
+            counters["avg_payload_bytes"] = round(counters["fill_bytes"] / fills) if fills else None
+        return families
+
+    def reset(self):
+        with self._lock:
+            self._families.clear()
+
+metrics = CacheMetrics()
@@ -1,4 +1,5 @@
 from .helper_functions import get_client_ip
+from .cache_utils import cache_ttl
 from django.core.cache import cache
 from django.http import JsonResponse
 import time
@@ -8,7 +9,7 @@ class IPTrackingMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
         self.rate_limit = 60
-        self.window = 300
+        self.window = cache_ttl("rate_limit")
 
     def __call__(self, request):
         ip_address = get_client_ip(request)
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+import base64, binascii, json
+
+def encode_cursor(ordering, values):
+    """Encode the ordering values of the last row of a page into an opaque cursor"""
+    raw = [value.isoformat() if hasattr(value, "isoformat") else str(value) for value in values]
+    return base64.urlsafe_b64encode(json.dumps([ordering[0], *raw]).encode()).decode()
+
+def decode_cursor(cursor, ordering, model):
+    """Decode a cursor back into its ordering values, False if it is malformed or for another ordering"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return False
+    if not isinstance(values, list) or len(values) != 3 or values[0] != ordering[0]:
+        return False
+    try:
+        return [model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(ordering, values[1:])]
+    except ValidationError:
+        return False
+
+def get_page_size(value):
+    """Clamp the requested page size between 1 and PROPERTY_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return settings.PROPERTY_PAGE_SIZE
+    return max(1, min(page_size, settings.PROPERTY_MAX_PAGE_SIZE))
+
+def _after(field):
+    """Lookup selecting rows that come after a value in the given ordering"""
+    if field.startswith("-"):
+        return f"{field[1:]}__lt"
+    return f"{field}__gt"
+
+def keyset_page(queryset, ordering, cursor=None, page_size=None):
+    """
+    Fetch one page of the queryset ordered by a (column, unique tie-breaker) pair.
+    Rows are selected with a range condition on the ordering columns instead of
+    an OFFSET, so every page costs the same index range scan.
+    Returns the rows and the cursor of the next page (None on the last page).
+    """
+    page_size = page_size or settings.PROPERTY_PAGE_SIZE
+    first, second = ordering
+    queryset = queryset.order_by(first, second)
+    if cursor:
+        first_value, second_value = cursor
+        queryset = queryset.filter(
+            Q(**{_after(first): first_value}) |
+            Q(**{first.lstrip("-"): first_value, _after(second): second_value})
+        )
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(ordering, [getattr(last, first.lstrip("-")), getattr(last, second.lstrip("-"))])
+    return rows, next_cursor
@@ -0,0 +1,57 @@
+from rest_framework.permissions import BasePermission
+from .helper_functions import get_host_profile
+
+class AuthContext:
+    """
+    Who is making a request, resolved once and shared by the permission classes
+    and the view. The user is the one authentication already loaded from the
+    cache; the host profile is only looked up the first time it is needed.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._host = None
+
+    @property
+    def is_verified(self):
+        return bool(self.user and self.user.is_authenticated and self.user.is_active and self.user.verified)
+
+    @property
+    def is_admin(self):
+        return self.is_verified and self.user.is_superuser
+
+    @property
+    def host(self):
+        """Host profile of the user, False when the user is not a host"""
+        if self._host is None:
+            self._host = get_host_profile(self.user) if self.is_verified else False
+        return self._host
+
+    def set_host(self, host):
+        self._host = host
+
+def auth_context(request):
+    """The AuthContext of a request, built on first use"""
+    context = getattr(request, '_auth_context', None)
+    if context is None:
+        context = AuthContext(request.user)
+        request._auth_context = context
+    return context
+
+class IsVerifiedUser(BasePermission):
+    message = 'User does not exist or inactive.'
+
+    def has_permission(self, request, view):
+        return auth_context(request).is_verified
+
+class IsHost(BasePermission):
+    message = 'Host not found or inactive, or not a host, fill the host form to upgrade your account.'
+
+    def has_permission(self, request, view):
+        return bool(auth_context(request).host)
+
+class IsAdmin(BasePermission):
+    message = 'You do not have permission to perform this action!'
+
+    def has_permission(self, request, view):
+        return auth_context(request).is_admin
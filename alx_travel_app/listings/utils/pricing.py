@@ -0,0 +1,48 @@
+from listings.models import SeasonalRate
+from decimal import Decimal
+import numpy as np
+
+# Friday and Saturday nights are charged the weekend rate when the property has one.
+WEEKEND_NIGHTS = (4, 5)
+
+def to_cents(amount):
+    return int(amount * 100)
+
+def from_cents(cents):
+    return (Decimal(int(cents)) / 100).quantize(Decimal("0.01"))
+
+def nightly_rates(properties, check_in, check_out):
+    """
+    Price in cents of every night of [check_in, check_out) for every property,
+    as a (properties, nights) int64 matrix built with whole-array operations:
+    the base rate, the weekend rate on weekend nights, then seasonal rates
+    (latest created wins where they overlap) from a single query.
+    """
+    nights = (check_out - check_in).days
+    weekdays = (check_in.weekday() + np.arange(nights)) % 7
+    weekend = np.isin(weekdays, WEEKEND_NIGHTS)
+
+    base = np.array([to_cents(property.pricepernight) for property in properties], dtype=np.int64)
+    weekend_rate = np.array([to_cents(property.weekendpricepernight) if property.weekendpricepernight is not None
+                             else to_cents(property.pricepernight) for property in properties], dtype=np.int64)
+    rates = np.where(weekend[np.newaxis, :], weekend_rate[:, np.newaxis], base[:, np.newaxis])
+
+    rows = {property.property_id: row for row, property in enumerate(properties)}
+    seasons = (SeasonalRate.objects.filter(property_id__in=list(rows), start_date__lt=check_out, end_date__gt=check_in)
+               .order_by('created_at').values_list('property_id', 'start_date', 'end_date', 'pricepernight'))
+    for property_id, start_date, end_date, pricepernight in seasons:
+        first = max((start_date - check_in).days, 0)
+        last = min((end_date - check_in).days, nights)
+        rates[rows[property_id], first:last] = to_cents(pricepernight)
+    return rates
+
+def quote_stays(properties, check_in, check_out):
+    """Total price of the same stay at many properties, {property_id: Decimal}"""
+    properties = list(properties)
+    if not properties:
+        return {}
+    totals = nightly_rates(properties, check_in, check_out).sum(axis=1)
+    return {property.property_id: from_cents(total) for property, total in zip(properties, totals)}
+
+def quote_stay(property, check_in, check_out):
+    return quote_stays([property], check_in, check_out)[property.property_id]
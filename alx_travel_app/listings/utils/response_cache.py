@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from urllib.parse import urlencode
+from .cache_utils import generation_key, single_flight, release, wait_for, cache_ttl
+from .metrics import metrics
+import math, random, time
+
+def response_cache_key(request, family, params=None):
+    """One key per family, role, path and normalized query string (or validated params)"""
+    role = getattr(request.user, "role", "anonymous")
+    if params is not None:
+        query = urlencode(sorted((name, str(value)) for name, value in params.items()))
+    else:
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return f"response_{family}_{role}_{request.path}?{query}"
+
+def read_entry(key, family):
+    """Current generation of the family and the stored entry, in one round trip"""
+    values = cache.get_many([generation_key(family), key])
+    return values.get(generation_key(family), 0), values.get(key)
+
+def is_fresh(entry, generation):
+    """
+    An entry is fresh while its generation is current and it has not expired.
+    Close to expiry it turns stale early with a probability that grows with the
+    time the last rebuild took (XFetch), so a hot key is refreshed by one
+    request before it expires for all of them.
+    """
+    stored_generation, body, expires_at, delta = entry
+    if stored_generation != generation:
+        return False
+    early = delta * settings.CACHE_EARLY_REFRESH_BETA * -math.log(1.0 - random.random())
+    return time.time() + early < expires_at
+
+def json_response(body):
+    return HttpResponse(body, content_type="application/json")
+
+def cached_json_response(request, family, build, timeout=None, params=None):
+    """
+    Serve the already encoded JSON body of a read endpoint from cache.
+    The entry is stored with the generation of its family, so the model signals
+    invalidate it by bumping the generation. On a hit no model is unpickled and
+    no serializer or renderer runs. build() is only called on a miss and returns
+    the response data, or a Response which is passed through uncached. Endpoints
+    that validate their filters pass them as params so equivalent queries share a key.
+    Only the worker holding the rebuild lock calls build(), the others keep
+    serving the stale entry, or wait briefly for the new one if there is none.
+    """
+    key = response_cache_key(request, family, params)
+    generation, entry = read_entry(key, family)
+    if entry is not None and is_fresh(entry, generation):
+        metrics.hit("list")
+        return json_response(entry[1])
+    lock = single_flight(key)
+    if lock is None:
+        if entry is not None:
+            metrics.hit("list", stale=True)
+            return json_response(entry[1])
+        entry = wait_for(lambda: read_entry(key, family)[1])
+        if entry is not None:
+            metrics.hit("list")
+            return json_response(entry[1])
+    metrics.miss("list")
+    try:
+        started = time.monotonic()
+        data = build()
+        if isinstance(data, Response):
+            return data
+        body = JSONRenderer().render(data)
+        timeout = timeout or cache_ttl("list")
+        entry = (generation, body, time.time() + timeout, time.monotonic() - started)
+        cache.set(key, entry, timeout + settings.CACHE_STALE_TTL)
+        metrics.fill("list", entry[3], len(body))
+    finally:
+        if lock is not None:
+            release(lock)
+    return json_response(body)
@@ -0,0 +1,100 @@
+from django.db import connection
+import re, uuid
+
+# Side table holding the inverted index of verified property names and descriptions.
+# SQLite keeps it in an FTS5 virtual table, PostgreSQL in a tsvector column with a GIN index.
+SEARCH_TABLE = "listings_property_search"
+WORD = re.compile(r"\w+", re.UNICODE)
+# PostgreSQL drops these through its english dictionary, FTS5 has no stop words of its own.
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with".split()
+)
+
+def search_backend(using=None):
+    """The search flavour of the connection, None when it has no full-text index"""
+    vendor = (using or connection).vendor
+    if vendor in ("sqlite", "postgresql"):
+        return vendor
+    return None
+
+def _property_id(value):
+    # Django stores UUIDs as 32 hex characters on SQLite and as native uuid on PostgreSQL.
+    if search_backend() == "sqlite":
+        return value.hex
+    return value
+
+def index_property(instance):
+    """Insert or replace the index row of one property"""
+    backend = search_backend()
+    with connection.cursor() as cursor:
+        if backend == "sqlite":
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE property_id = %s", [_property_id(instance.property_id)])
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (property_id, name, description) VALUES (%s, %s, %s)",
+                [_property_id(instance.property_id), instance.name, instance.description],
+            )
+        elif backend == "postgresql":
+            # Name matches weigh more than description matches in the ranking.
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (property_id, document) VALUES (%s, "
+                "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B')) "
+                "ON CONFLICT (property_id) DO UPDATE SET document = EXCLUDED.document",
+                [instance.property_id, instance.name, instance.description],
+            )
+
+def unindex_property(property_id):
+    """Remove one property from the index"""
+    if not search_backend():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE property_id = %s", [_property_id(property_id)])
+
+def sync_property(instance):
+    """Keep the index in line with a saved property, only verified ones are searchable"""
+    if instance.verification == 'verified':
+        index_property(instance)
+    else:
+        unindex_property(instance.property_id)
+
+def rebuild_search_index(queryset):
+    """Reindex every property of the queryset from scratch, returns the number indexed"""
+    if not search_backend():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    count = 0
+    for instance in queryset.iterator(chunk_size=2000):
+        index_property(instance)
+        count += 1
+    return count
+
+def _fts5_query(terms):
+    # Quote every term so user input can never be parsed as FTS5 query syntax.
+    return " ".join(f'"{term}"' for term in terms)
+
+def search_property_ids(text, limit):
+    """
+    Ids of the properties matching every word of text, best match first.
+    Returns None when the database has no full-text index.
+    """
+    backend = search_backend()
+    if backend is None:
+        return None
+    terms = [term for term in WORD.findall(text.lower()) if term not in STOP_WORDS]
+    if not terms:
+        return []
+    with connection.cursor() as cursor:
+        if backend == "sqlite":
+            # bm25 is lower for better matches, name hits count ten times description hits.
+            cursor.execute(
+                f"SELECT property_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"ORDER BY bm25({SEARCH_TABLE}, 0.0, 10.0, 1.0) LIMIT %s",
+                [_fts5_query(terms), limit],
+            )
+        else:
+            cursor.execute(
+                f"SELECT property_id FROM {SEARCH_TABLE}, plainto_tsquery('english', %s) query "
+                "WHERE document @@ query ORDER BY ts_rank_cd(document, query) DESC LIMIT %s",
+                [" ".join(terms), limit],
+            )
+        return [uuid.UUID(str(row[0])) for row in cursor.fetchall()]
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models import Q, Sum
+from listings.models import Booking, PropertyMonthlySummary
+from datetime import timedelta
+from decimal import Decimal
+
+# A booking counts, with its completed payments, in the month it starts;
+# its nights are spread over the months they fall in.
+
+def month_start(day):
+    return day.replace(day=1)
+
+def next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+def stay_months(start_date, end_date):
+    """First day of every month holding a night of [start_date, end_date)"""
+    months = []
+    month = month_start(start_date)
+    while month < end_date:
+        months.append(month)
+        month = next_month(month)
+    return months or [month_start(start_date)]
+
+def summary_rows(bookings):
+    """Fold live bookings into {(property_id, month): counters}"""
+    rows = bookings.exclude(status='canceled').annotate(
+        paid=Sum('payments__amount', filter=Q(payments__status='completed'))
+    ).values_list('property_id', 'start_date', 'end_date', 'paid')
+    summaries = {}
+    for property_id, start_date, end_date, paid in rows.iterator(chunk_size=2000):
+        counters = summaries.setdefault((property_id, month_start(start_date)), _empty())
+        counters['bookings'] += 1
+        counters['revenue'] += paid or 0
+        for month in stay_months(start_date, end_date):
+            nights = (min(end_date, next_month(month)) - max(start_date, month)).days
+            summaries.setdefault((property_id, month), _empty())['booked_nights'] += nights
+    return summaries
+
+def _empty():
+    return {'bookings': 0, 'booked_nights': 0, 'revenue': Decimal(0)}
+
+def refresh_summaries(property_id, months):
+    """Recompute the summaries of one property for the given months from its bookings"""
+    months = sorted(set(months))
+    first, end = months[0], next_month(months[-1])
+    # Bookings starting in these months, or with nights in them, all overlap [first, end).
+    bookings = Booking.objects.filter(property_id=property_id, start_date__lt=end, end_date__gt=first)
+    summaries = summary_rows(bookings)
+    rows = [PropertyMonthlySummary(property_id=property_id, month=month, **summaries[(property_id, month)])
+            for month in months if (property_id, month) in summaries]
+    with transaction.atomic():
+        PropertyMonthlySummary.objects.filter(property_id=property_id, month__in=months).exclude(
+            month__in=[row.month for row in rows]).delete()
+        # An upsert, concurrent refreshes of the same month cannot trip the unique constraint.
+        PropertyMonthlySummary.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['property', 'month'],
+            update_fields=['bookings', 'booked_nights', 'revenue', 'updated_at'])
+
+def schedule_refresh(booking):
+    """Refresh the months of a booking once the change that touched it is committed"""
+    property_id, months = booking.property_id, stay_months(booking.start_date, booking.end_date)
+    transaction.on_commit(lambda: refresh_summaries(property_id, months))
+
+def rebuild_summaries(property_ids=None, batch_size=2000):
+    """Replace the summaries of the given properties (all by default) with a fresh bulk computation"""
+    bookings = Booking.objects.all()
+    existing = PropertyMonthlySummary.objects.all()
+    if property_ids is not None:
+        bookings = bookings.filter(property_id__in=property_ids)
+        existing = existing.filter(property_id__in=property_ids)
+    summaries = summary_rows(bookings)
+    with transaction.atomic():
+        existing.delete()
+        PropertyMonthlySummary.objects.bulk_create(
+            [PropertyMonthlySummary(property_id=property_id, month=month, **counters)
+             for (property_id, month), counters in summaries.items()], batch_size=batch_size)
+    return len(summaries)
+
+def days_in_month(month):
+    return (next_month(month) - month).days
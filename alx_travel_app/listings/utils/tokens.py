@@ -1,4 +1,7 @@
-import jwt, os, logging
+from django.conf import settings
+from django.core.cache import cache
+from .keys import key_provider
+import jwt, logging, time, uuid
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)  
@@ -12,20 +15,21 @@ def get_token(user_id, email):
         "iss": str(user_id),
         "sub": email,
         "iat": int(datetime.now().timestamp()),
-        "exp": int(expiration_time().timestamp())
+        "exp": int(expiration_time().timestamp()),
+        "jti": uuid.uuid4().hex
     }
 
-    with open('private.pem', 'rb') as file:
-        key = file.read()
-    token = jwt.encode(payload=payload, key=key, algorithm=os.environ.get("ALGORITHM"))
+    kid, key = key_provider.signing_key()
+    token = jwt.encode(payload=payload, key=key, algorithm=settings.JWT_ALGORITHM, headers={"kid": kid})
     return token
 
 def decode_token(token):
-    with open("public.pem", "rb") as file:
-        key = file.read()
-    
     try:
-        payload = jwt.decode(token, key=key, algorithms=[os.environ.get("ALGORITHM")])
+        key = key_provider.verification_key(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            logger.error("Unknown signing key")
+            return False
+        payload = jwt.decode(token, key=key, algorithms=[settings.JWT_ALGORITHM])
         return payload
     except jwt.ExpiredSignatureError:
         logger.error("Token expired")
@@ -45,3 +49,19 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         logger.error("Invalid token")
         return False
+
+def consume_token(payload):
+    """
+    Mark a decoded token as used, True only for its first use. The jti is added
+    to Redis with SET NX until the token expires, so a replayed link is turned
+    away before any database work.
+    """
+    jti = payload.get("jti")
+    if not jti:
+        logger.error("Token has no jti")
+        return False
+    ttl = max(int(payload.get("exp", 0) - time.time()), 1)
+    if not cache.add(f"used_token_{jti}", 1, ttl):
+        logger.error("Token already used")
+        return False
+    return True
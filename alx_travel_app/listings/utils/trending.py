@@ -0,0 +1,61 @@
+from django.conf import settings
+from .cache_utils import get_redis
+import time
+
+TRENDING_KEY = "trending_properties"
+EPOCH_KEY = "trending_properties_epoch"
+
+# Forward decay: an event is stored as weight * 2^((t - epoch) / half_life), so older
+# events weigh exponentially less relative to new ones without ever rewriting them.
+# The epoch is read inside Redis so a score is never scaled against a moved epoch.
+RECORD_SCRIPT = """
+local epoch = tonumber(redis.call('GET', KEYS[2]))
+if not epoch then
+    epoch = tonumber(ARGV[2])
+    redis.call('SET', KEYS[2], ARGV[2])
+end
+local score = tonumber(ARGV[1]) * math.pow(2, (tonumber(ARGV[2]) - epoch) / tonumber(ARGV[3]))
+return tostring(redis.call('ZINCRBY', KEYS[1], score, ARGV[4]))
+"""
+
+# Move the epoch to now: scale every score down by the elapsed decay, drop the ones
+# that decayed to noise and keep only the top entries. Runs atomically in Redis.
+COMPACT_SCRIPT = """
+local epoch = tonumber(redis.call('GET', KEYS[2]))
+if not epoch then
+    redis.call('SET', KEYS[2], ARGV[1])
+    return 0
+end
+local factor = math.pow(2, (epoch - tonumber(ARGV[1])) / tonumber(ARGV[2]))
+redis.call('ZUNIONSTORE', KEYS[1], 1, KEYS[1], 'WEIGHTS', tostring(factor))
+local dropped = redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[3])
+dropped = dropped + redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[4]) - 1)
+redis.call('SET', KEYS[2], ARGV[1])
+return dropped
+"""
+
+_scripts = {}
+
+def _script(source):
+    if source not in _scripts:
+        _scripts[source] = get_redis().register_script(source)
+    return _scripts[source]
+
+def record_event(property_id, weight):
+    """Add a booking or review to the decayed popularity of a property, O(log n)"""
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return float(_script(RECORD_SCRIPT)(keys=[TRENDING_KEY, EPOCH_KEY],
+                                        args=[weight, time.time(), half_life, str(property_id)]))
+
+def remove_property(property_id):
+    get_redis().zrem(TRENDING_KEY, str(property_id))
+
+def trending_ids(limit):
+    """Ids of the most popular properties, best first, one O(log n + limit) range read"""
+    return [member.decode() for member in get_redis().zrevrange(TRENDING_KEY, 0, limit - 1)]
+
+def compact():
+    """Rebase the scores on the current time and trim the set, returns the number dropped"""
+    return _script(COMPACT_SCRIPT)(keys=[TRENDING_KEY, EPOCH_KEY],
+                                   args=[time.time(), settings.TRENDING_HALF_LIFE_HOURS * 3600,
+                                         settings.TRENDING_MIN_SCORE, settings.TRENDING_MAX_SIZE])
@@ -1,53 +1,50 @@
-from .serializers import PropertySerializer, BookingSerializer, HostSerializer, HostProfileSerializer
+from .serializers import PropertySerializer, BookingSerializer, HostSerializer, HostProfileSerializer, PropertyFilterSerializer, PropertySearchSerializer, PropertyAvailabilitySerializer, PropertyCalendarSerializer, PropertyQuoteSerializer, SeasonalRateSerializer, ReviewSerializer, DashboardFilterSerializer, HostBookingSerializer, HostBookingFilterSerializer
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+from drf_spectacular.utils import extend_schema
 
-from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q, prefetch_related_objects
 
-from .utils.helper_functions import check_if_is_admin, check_single_user_in_cache_db, check_if_user_is_a_host, check_if_property_in_cache_db, check_if_user_has_booked
-from .models import Property, Booking, Payment
+from .utils.helper_functions import check_if_user_is_a_host, check_if_property_in_cache_db, check_if_user_has_booked, overlapping_bookings, create_booking
+from .utils.pagination import decode_cursor, get_page_size, keyset_page
+from .utils.permissions import IsAdmin, IsHost, auth_context
+from .utils.cache_utils import load_entities, set_entity, local_cache
+from .utils.metrics import metrics
+from .utils.response_cache import cached_json_response
+from .utils.search import search_property_ids
+from .utils.availability import load_calendars
+from .utils.pricing import quote_stay, quote_stays
+from .utils.summaries import days_in_month
+from .utils.trending import trending_ids
+from .models import Property, Booking, Payment, SeasonalRate, Review, PropertyMonthlySummary
 from .tasks import email_verification
 from .utils.tokens import get_token
 from .models import Property, Booking, Host
 from .serializers import PaymentSerializer
 import uuid, os
+import numpy as np
+from decimal import Decimal
 
 def generate_random_uuid():
-    count = 0
-    uu = uuid.uuid4
-    return f"{uu}_{count+1}" 
+    # transaction_id is unique, every payment needs a fresh value.
+    return uuid.uuid4().hex
 
 class ModifyHostViewset(viewsets.ModelViewSet):
     serializer_class = HostSerializer
+    permission_classes = [IsAdmin]
     lookup_field = 'uuid'
 
     def get_queryset(self):
-        all_hosts = cache.get("hosts")
-        if all_hosts is None or all_hosts == []:
-            all_host_details = list(Host.objects.all())
-            cache.set("hosts", all_host_details)
-            all_hosts = all_host_details
-        return all_hosts
+        # Each host comes with its user from the same query.
+        return Host.objects.select_related('host').order_by('created_at')
     
     def list(self, request, *args, **kwargs):
-        admin_exist = check_single_user_in_cache_db(request.user.user_id)
-        if not admin_exist:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        checking = check_if_is_admin(admin_exist)
-        if not checking:
-            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)  
-        serializer = self.serializer_class(self.get_queryset(), many=True)
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        return cached_json_response(request, "hosts", lambda: self.serializer_class(self.get_queryset(), many=True).data)
     
     def retrieve(self, request, *args, **kwargs):
-        admin_exist = check_single_user_in_cache_db(request.user.user_id)
-        if not admin_exist:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        checking = check_if_is_admin(admin_exist)
-        if not checking:
-            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)
-        
         user_uuid = kwargs.get("uuid")
         if user_uuid is None:
             return Response({'error': 'User UUID is missing'}, status=status.HTTP_400_BAD_REQUEST)
@@ -58,13 +55,6 @@ class ModifyHostViewset(viewsets.ModelViewSet):
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
     def update(self, request, *args, **kwargs):
-        admin_exist = check_single_user_in_cache_db(request.user.user_id)
-        if not admin_exist:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        checking = check_if_is_admin(admin_exist)
-        if not checking:
-            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)
-        
         user_uuid = kwargs.get("uuid")
         if user_uuid is None:
             return Response({'error': 'User UUID is missing'}, status=status.HTTP_400_BAD_REQUEST)
@@ -80,14 +70,15 @@ class HostViewset(viewsets.ModelViewSet):
     serializer_class = HostProfileSerializer
        
     def get_object(self):
-        user = check_if_user_is_a_host(self.request.user.user_id)
-        if not user:
-            return Response({'error': 'Host account does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        return user
+        host = auth_context(self.request).host
+        if host:
+            # The profile embeds the host's properties, fetched with one query.
+            prefetch_related_objects([host], 'host__properties')
+        return host
     
     def create(self, request, *args, **kwargs):
-        user = check_if_user_is_a_host(request.user.user_id)
-        if user:
+        context = auth_context(request)
+        if context.host:
             return Response({"error": "Host profile already exists for this user."}, status=status.HTTP_400_BAD_REQUEST)
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -97,24 +88,25 @@ class HostViewset(viewsets.ModelViewSet):
         identity = valid_data['identity']
         social_link = valid_data['social_link']
         profile_photo = valid_data.get('profile_photo', None)
-        host = Host.objects.create(host=request.user.user_id, bio=bio,
+        host = Host.objects.create(host=request.user, bio=bio,
                                 address=address, identity=identity,
                                 social_link=social_link, profile_photo=profile_photo)
+        user = context.user
         if user.role != 'admin':
             user.role = 'host'
             user.save(update_fields=['role'])
-        cache.set(f"host_profile_{host.host}", host)
+        set_entity(f"host_profile_{host.host_id}", host)
+        context.set_host(host)
         serializer = self.serializer_class(host)
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
     
     def retrieve(self, request, *args, **kwargs):
-        user = check_if_user_is_a_host(request.user.user_id)
-        if not user:
+        if not auth_context(request).host:
             return Response({"error": "Host profile does not exist for this user."}, status=status.HTTP_404_NOT_FOUND)
         return super().retrieve(request, *args, **kwargs)
     
     def update(self, request, *args, **kwargs):
-        user = check_if_user_is_a_host(request.user.user_id)
+        user = auth_context(request).host
         if not user:
             return Response({"error": "Host profile does not exist for this user."}, status=status.HTTP_404_NOT_FOUND)
         serializer = self.serializer_class(data=request.data, instance=user, partial=True)
@@ -122,23 +114,26 @@ class HostViewset(viewsets.ModelViewSet):
         serializer.save()
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
+# Keyset orderings of the property listing, each ends with the primary key as a tie-breaker.
+PROPERTY_ORDERINGS = {
+    'newest': ("-created_at", "-property_id"),
+    'price_asc': ("pricepernight", "property_id"),
+    'price_desc': ("-pricepernight", "-property_id"),
+}
+
 class PropertyViewset(viewsets.ModelViewSet):
     serializer_class = PropertySerializer
     lookup_field = "uuid"
 
     def get_queryset(self):
-        properties = cache.get("properties")
-        if properties is None or properties == []:
-            all_properties = list(Property.objects.filter(verification='verified'))
-            properties = all_properties
-            cache.set("properties", all_properties)          
-            properties = all_properties
-        return properties
+        return Property.objects.filter(verification='verified')
+
+    def get_permissions(self):
+        if self.action in ('create', 'update', 'partial_update', 'destroy'):
+            return [IsHost()]
+        return super().get_permissions()
 
     def create(self, request, *args, **kwargs):
-        host = check_if_user_is_a_host(request.user.user_id)
-        if not host:
-            return Response({"error": "Host not found or inactive, or not a host, fill the host form to upgrade your account."}, status=status.HTTP_404_NOT_FOUND)
         if request.user.role == "guest":
             return Response({"error": "You cannot perform this account with a guest account, fill the host form to upgrade your account."}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -148,37 +143,141 @@ class PropertyViewset(viewsets.ModelViewSet):
         description = serializer.validated_data['description']
         location = serializer.validated_data['location']
         pricepernight = serializer.validated_data['pricepernight']
+        weekendpricepernight = serializer.validated_data.get('weekendpricepernight')
         property = Property.objects.create(user=request.user, name=name, description=description, 
-                                           location=location, pricepernight=pricepernight)
-        cache.set(f"property_{property.property_id}", property)
+                                           location=location, pricepernight=pricepernight,
+                                           weekendpricepernight=weekendpricepernight)
         serializer = self.serializer_class(property)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
     
+    @extend_schema(parameters=[PropertyFilterSerializer])
     def list(self, request, *args, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({"error": "User not found or inactive."}, status=status.HTTP_404_NOT_FOUND)
-        serializer = self.serializer_class(self.get_queryset(), many=True)
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        return self.filtered_page(request, PropertyFilterSerializer, "properties")
+
+    @extend_schema(parameters=[PropertyAvailabilitySerializer])
+    def available(self, request, *args, **kwargs):
+        # Bookings move availability, so these pages live in their own generation.
+        return self.filtered_page(request, PropertyAvailabilitySerializer, "availability")
+
+    def filtered_page(self, request, filter_class, family):
+        filters = filter_class(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+        ordering = PROPERTY_ORDERINGS[params['sort']]
+        cursor = None
+        if params.get('cursor'):
+            cursor = decode_cursor(params['cursor'], ordering, Property)
+            if not cursor:
+                return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = get_page_size(params.get('page_size'))
+
+        def build():
+            rows, next_cursor = keyset_page(self.search_queryset(params), ordering, cursor, page_size)
+            results = self.serializer_class(rows, many=True).data
+            if params.get('check_in'):
+                # Price the requested stay for the whole page at once.
+                totals = quote_stays(rows, params['check_in'], params['check_out'])
+                for row, result in zip(rows, results):
+                    result['total_price'] = str(totals[row.property_id])
+            return {"next": next_cursor, "results": results}
+        return cached_json_response(request, family, build, params={**params, 'page_size': page_size})
     
-    def retrieve(self, request, *args, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({"error": "User not found or inactive."}, status=status.HTTP_404_NOT_FOUND)
+    def search_queryset(self, params):
+        queryset = self.get_queryset()
+        if params.get('location'):
+            queryset = queryset.filter(location=params['location'])
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('min_price') is not None:
+            queryset = queryset.filter(pricepernight__gte=params['min_price'])
+        if params.get('max_price') is not None:
+            queryset = queryset.filter(pricepernight__lte=params['max_price'])
+        if params.get('check_in'):
+            booked = overlapping_bookings(OuterRef('pk'), params['check_in'], params['check_out'])
+            queryset = queryset.filter(~Exists(booked))
+        return queryset
+
+    @extend_schema(parameters=[PropertySearchSerializer])
+    def search(self, request, *args, **kwargs):
+        serializer = PropertySearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        text = serializer.validated_data['q']
+        limit = get_page_size(serializer.validated_data.get('limit'))
+
+        def build():
+            ids = search_property_ids(text, limit)
+            if ids is None:
+                # No full-text index on this database, fall back to a plain scan.
+                rows = self.get_queryset().filter(Q(name__icontains=text) | Q(description__icontains=text))[:limit]
+            else:
+                found = load_entities(ids, "property_", self.get_queryset(), "property_id")
+                rows = [found[str(property_id)] for property_id in ids if str(property_id) in found]
+            return {"results": self.serializer_class(rows, many=True).data}
+        return cached_json_response(request, "properties", build, params={'q': text.lower(), 'limit': limit})
+
+    def trending(self, request, *args, **kwargs):
+        ids = trending_ids(get_page_size(request.query_params.get('limit')))
+        found = load_entities(ids, "property_", self.get_queryset(), "property_id")
+        rows = [found[property_id] for property_id in ids if property_id in found]
+        return Response({"results": self.serializer_class(rows, many=True).data}, status=status.HTTP_200_OK)
+
+    @extend_schema(parameters=[PropertyCalendarSerializer])
+    def calendar(self, request, *args, **kwargs):
+        serializer = PropertyCalendarSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        found = load_entities(params['ids'], "property_", self.get_queryset(), "property_id")
+        property_ids = [property_id for property_id in dict.fromkeys(params['ids']) if str(property_id) in found]
+        if not property_ids:
+            return Response({"start": params['start'], "end": params['end'], "calendars": {}}, status=status.HTTP_200_OK)
+        booked = load_calendars(property_ids, params['start'], params['end'])
+        # One character per night, "1" when it is booked.
+        rows = (booked + ord("0")).astype(np.uint8)
+        calendars = {str(property_id): row.tobytes().decode() for property_id, row in zip(property_ids, rows)}
+        return Response({"start": params['start'], "end": params['end'], "calendars": calendars}, status=status.HTTP_200_OK)
+
+    @extend_schema(parameters=[PropertyQuoteSerializer])
+    def quote(self, request, *args, **kwargs):
+        serializer = PropertyQuoteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        found = load_entities(params['ids'], "property_", self.get_queryset(), "property_id")
+        properties = [found[str(property_id)] for property_id in dict.fromkeys(params['ids']) if str(property_id) in found]
+        totals = quote_stays(properties, params['check_in'], params['check_out'])
+        return Response({"check_in": params['check_in'], "check_out": params['check_out'],
+                         "nights": (params['check_out'] - params['check_in']).days,
+                         "quotes": {str(property_id): str(total) for property_id, total in totals.items()}},
+                        status=status.HTTP_200_OK)
+
+    def rates(self, request, *args, **kwargs):
+        user = request.user
         property = check_if_property_in_cache_db(kwargs.get('uuid'))
         if not property:
             return Response({'error': 'Property does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        serializer = self.get_serializer(property)
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        if request.method == 'GET':
+            rates = SeasonalRate.objects.filter(property=property).order_by('start_date')
+            return Response(data=SeasonalRateSerializer(rates, many=True).data, status=status.HTTP_200_OK)
+        if property.user_id != user.user_id and user.role != 'admin':
+            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = SeasonalRateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rate = SeasonalRate.objects.create(property=property, **serializer.validated_data)
+        return Response(data=SeasonalRateSerializer(rate).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+
+        def build():
+            property = check_if_property_in_cache_db(kwargs.get('uuid'))
+            if not property:
+                return Response({'error': 'Property does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
+            return self.get_serializer(property).data
+        return cached_json_response(request, f"property_{kwargs.get('uuid')}", build)
     
     def update(self, request, *args, **kwargs):
-        host = check_if_user_is_a_host(request.user.user_id)
-        if not host:
-            return Response({"error": "Host not found or inactive, or not a host, fill the host form to upgrade your account."}, status=status.HTTP_404_NOT_FOUND)
         property = check_if_property_in_cache_db(kwargs.get('uuid'))
         if not property:
             return Response({'error': 'Property does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
-        if host.host != property.user.user_id or request.user.role != 'admin':
+        if property.user_id != request.user.user_id and request.user.role != 'admin':
             return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)
         serializer = self.get_serializer(data=request.data, instance=property, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -187,9 +286,6 @@ class PropertyViewset(viewsets.ModelViewSet):
         return Response(data=serializer.data, status=status.HTTP_202_ACCEPTED)
     
     def destroy(self, request, *args, **kwargs):
-        host = check_if_user_is_a_host(request.user.user_id)
-        if not host:
-            return Response({"error": "Host not found or inactive, or not a host, fill the host form to upgrade your account."}, status=status.HTTP_404_NOT_FOUND)
         property = check_if_property_in_cache_db(kwargs.get('uuid'))
         if not property:
             return Response({'error': 'Property does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -200,17 +296,64 @@ class PropertyViewset(viewsets.ModelViewSet):
         property.save(update_fields=['verification', 'status'])
         return Response({'success': 'Successfully deleted the property'}, status=status.HTTP_200_OK)
     
+REVIEW_ORDERING = ("-created_at", "-review_id")
+
+class ReviewViewset(viewsets.ModelViewSet):
+    serializer_class = ReviewSerializer
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        return Review.objects.filter(property_id=self.kwargs.get('uuid'))
+
+    def create(self, request, *args, **kwargs):
+        user = request.user
+        property = check_if_property_in_cache_db(kwargs.get('uuid'))
+        if not property or property.verification != 'verified':
+            return Response({'error': 'Property does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
+        if property.user_id == user.user_id:
+            return Response({'error': 'You cannot review your own property.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not Booking.objects.filter(property=property, user=user).exclude(status='canceled').exists():
+            return Response({'error': 'You can only review a property you have booked.'}, status=status.HTTP_403_FORBIDDEN)
+        if Review.objects.filter(property=property, user=user).exists():
+            return Response({'error': 'You have already reviewed this property.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(property=property, user=user, rating=serializer.validated_data['rating'],
+                                               comment=serializer.validated_data['comment'])
+        except IntegrityError:
+            # A concurrent request from the same guest inserted the review first.
+            return Response({'error': 'You have already reviewed this property.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data=self.serializer_class(review).data, status=status.HTTP_201_CREATED)
+
+    def list(self, request, *args, **kwargs):
+        cursor = None
+        if request.query_params.get('cursor'):
+            cursor = decode_cursor(request.query_params['cursor'], REVIEW_ORDERING, Review)
+            if not cursor:
+                return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = get_page_size(request.query_params.get('page_size'))
+
+        def build():
+            rows, next_cursor = keyset_page(self.get_queryset(), REVIEW_ORDERING, cursor, page_size)
+            return {"next": next_cursor, "results": self.serializer_class(rows, many=True).data}
+        return cached_json_response(request, f"reviews_{kwargs.get('uuid')}", build)
+
 class BookingViewset(viewsets.ModelViewSet):
     serializer_class = BookingSerializer
     lookup_field = "uuid"
 
     def get_queryset(self):
         return Booking.objects.filter(user=self.request.user)
+
+    def get_permissions(self):
+        if self.action in ('update', 'partial_update'):
+            return [IsAdmin()]
+        return super().get_permissions()
         
     def create(self, request, *args, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user
         property = check_if_property_in_cache_db(kwargs.get('uuid'))
         if not property:
             return Response({'error': 'Property does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -222,54 +365,117 @@ class BookingViewset(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         start_date = serializer.validated_data['start_date']
         end_date = serializer.validated_data['end_date']
-        booking = Booking.objects.create(property=property, user=user, start_date=start_date,
-                                        end_date=end_date, total_price=property.pricepernight)
+        booking = create_booking(property, user, start_date, end_date, quote_stay(property, start_date, end_date))
+        if booking is None:
+            return Response({'error': 'Property is already booked for some of these dates.'}, status=status.HTTP_409_CONFLICT)
         serializer = self.serializer_class(booking)
         # email_verification.delay_on_commit(name=booking.user.first_name, email=booking.user.email)
         return Response({'success': 'Go ahead to pay for the booking',
                         'data': serializer.data}, status=status.HTTP_200_OK)
 
     def list(self, request, *args, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
         serializer = self.serializer_class(self.get_queryset(), many=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
     
     def update(self, request, *args, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
         booking = kwargs.get("uuid")
         if booking is None:
             return Response({'error': 'Booking does not exist'}, status=status.HTTP_400_BAD_REQUEST)
-        admin_user = check_if_is_admin(user)
-        if not admin_user:
-            return Response({'error': 'You do not have permission to perform this action!'}, status=status.HTTP_403_FORBIDDEN)
         serializer = self.get_serializer(data=request.data, instance=booking, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer = self.serializer_class(booking)
         return Response({"message": "Please proceed to make payment."}, status=status.HTTP_200_OK)
 
+class HostDashboardView(APIView):
+    permission_classes = [IsHost]
+    http_method_names = ["get"]
+
+    @extend_schema(parameters=[DashboardFilterSerializer])
+    def get(self, request, *args, **kwargs):
+        serializer = DashboardFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        # Only the precomputed summaries are read, never bookings or payments.
+        summaries = (PropertyMonthlySummary.objects.filter(property__user_id=request.user.user_id,
+                                                           month__gte=params['start'], month__lte=params['end'])
+                     .order_by('property_id', 'month')
+                     .values('property_id', 'property__name', 'month', 'bookings', 'booked_nights', 'revenue'))
+        properties = {}
+        totals = {"bookings": 0, "booked_nights": 0, "revenue": Decimal(0)}
+        for row in summaries:
+            entry = properties.setdefault(row['property_id'], {"property_id": row['property_id'],
+                                                               "name": row['property__name'], "months": []})
+            entry["months"].append({"month": row['month'].strftime('%Y-%m'), "bookings": row['bookings'],
+                                    "booked_nights": row['booked_nights'], "revenue": str(row['revenue']),
+                                    "occupancy": round(row['booked_nights'] / days_in_month(row['month']), 4)})
+            for name in totals:
+                totals[name] += row[name]
+        totals["revenue"] = str(totals["revenue"])
+        return Response({"start": params['start'].strftime('%Y-%m'), "end": params['end'].strftime('%Y-%m'),
+                         "totals": totals, "properties": list(properties.values())}, status=status.HTTP_200_OK)
+
+HOST_BOOKING_ORDERINGS = {
+    "start_asc": ("start_date", "booking_id"),
+    "start_desc": ("-start_date", "-booking_id"),
+}
+
+class HostBookingsView(APIView):
+    serializer_class = HostBookingSerializer
+    permission_classes = [IsHost]
+    http_method_names = ["get"]
+
+    @extend_schema(parameters=[HostBookingFilterSerializer])
+    def get(self, request, *args, **kwargs):
+        filters = HostBookingFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+        ordering = HOST_BOOKING_ORDERINGS[params['sort']]
+        cursor = None
+        if params.get('cursor'):
+            cursor = decode_cursor(params['cursor'], ordering, Booking)
+            if not cursor:
+                return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        # Guest and property come from the same query, a page costs one round trip.
+        queryset = Booking.objects.filter(property__user_id=request.user.user_id).select_related('property', 'user')
+        if params.get('property'):
+            queryset = queryset.filter(property_id=params['property'])
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('start_from'):
+            queryset = queryset.filter(start_date__gte=params['start_from'])
+        if params.get('start_to'):
+            queryset = queryset.filter(start_date__lte=params['start_to'])
+        rows, next_cursor = keyset_page(queryset, ordering, cursor, get_page_size(params.get('page_size')))
+        return Response({"next": next_cursor, "results": self.serializer_class(rows, many=True).data}, status=status.HTTP_200_OK)
+
+class CacheMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+    http_method_names = ["get"]
+    serializer_class = None
+
+    def get(self, request, *args, **kwargs):
+        return Response({"pid": os.getpid(), "local_cache_entries": len(local_cache),
+                         "families": metrics.snapshot()}, status=status.HTTP_200_OK)
+
 class PaymentViewset(APIView):
     serializer_class = PaymentSerializer
 
     def post(self, request, *argss, **kwargs):
-        user = check_single_user_in_cache_db(request.user.user_id)
-        if not user:
-            return Response({'error': 'User does not exist or inactive.'}, status=status.HTTP_400_BAD_REQUEST)
+        user = request.user
         booking_id = kwargs.get("uuid")
         if booking_id is None:
             return Response({'error': 'Booking does not exist'}, status=status.HTTP_400_BAD_REQUEST)
         booking = check_if_user_has_booked(user.user_id, booking_id)
         if not booking:
             return Response({"error": "Booking does not exist."}, status=status.HTTP_400_BAD_REQUEST)
-        # if booking.status == "verified":
-        #     return Response({"error": "Payment has been made already"}, status=status.HTTP_400_BAD_REQUEST)
+        if booking.status == "confirmed":
+            return Response({"error": "Payment has been made already"}, status=status.HTTP_400_BAD_REQUEST)
+        if booking.status == "canceled":
+            return Response({"error": "Booking has been canceled."}, status=status.HTTP_400_BAD_REQUEST)
         Payment.objects.create(
-            booking=booking, amount=booking.total_price, transaction_id=generate_random_uuid()
+            booking=booking, amount=booking.total_price, status="completed", transaction_id=generate_random_uuid()
         )
-        booking.status="verified"
+        booking.status="confirmed"
         booking.save(update_fields=["status"])
         token = get_token(booking.user.user_id, booking.user.email)
         email_verification.delay(